@@ -13,6 +13,7 @@ Last updated: 2/23/2018
 
 import unittest
 import urllib2
+import gzip
 import matplotlib.pyplot as plt
 import math
 import random
@@ -24,25 +25,39 @@ CITATION_URL = "http://storage.googleapis.com/codeskulptor-alg/alg_phys-cite.txt
 
 def load_graph(graph_url):
     """
-    Function that loads a graph given the URL
-    for a text representation of the graph
+    Function that loads a graph given the URL (or a local,
+    optionally gzip-compressed, path) for a text representation
+    of the graph
     
-    Returns a dictionary that models a graph
+    Returns a dictionary that models a graph. A neighbor without a line
+    of its own is added as a node with no neighbors, as graph_io does.
     """
-    graph_file = urllib2.urlopen(graph_url)
-    graph_text = graph_file.read()
-    graph_lines = graph_text.split('\n')
-    graph_lines = graph_lines[ : -1]
-    
-    print "Loaded graph with", len(graph_lines), "nodes"
-    
+    if graph_url.startswith("http://") or graph_url.startswith("https://"):
+        graph_file = urllib2.urlopen(graph_url)
+    elif graph_url.endswith(".gz"):
+        graph_file = gzip.open(graph_url, 'rb')
+    else:
+        graph_file = open(graph_url, 'r')
+
+    # Parse the file one line at a time rather than splitting the whole text
     answer_graph = {}
-    for line in graph_lines:
-        neighbors = line.split(' ')
-        node = int(neighbors[0])
-        answer_graph[node] = set([])
-        for neighbor in neighbors[1 : -1]:
-            answer_graph[node].add(int(neighbor))
+    num_lines = 0
+    try:
+        for line in graph_file:
+            num_lines += 1
+            neighbors = map(int, line.split())
+            if neighbors:
+                answer_graph[neighbors[0]] = set(neighbors[1:])
+    finally:
+        graph_file.close()
+
+    for neighbors in answer_graph.values():
+        for head in neighbors:
+            if head not in answer_graph:
+                answer_graph[head] = set([])
+    num_edges = sum(len(neighbors) for neighbors in answer_graph.itervalues())
+
+    print "Read", num_lines, "lines:", len(answer_graph), "nodes and", num_edges, "edges"
 
     return answer_graph
 
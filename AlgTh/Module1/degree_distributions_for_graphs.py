@@ -12,6 +12,7 @@ Last updated: 2/20/2018
 """
 
 import unittest
+from collections import Counter
 
 # Constants whose values are dictionaries corresponding to graphs
 
@@ -61,28 +62,41 @@ def make_complete_graph(num_nodes):
 
 # Functions for computing degree distributions
 
-def compute_in_degrees(digraph):
+def check_self_loops(digraph):
+    """
+    Takes a directed graph digraph (represented as a dictionary)
+    and raises an AssertionError if any node has an edge to itself.
+    """
+    for node_key in digraph:
+        assert node_key not in digraph[node_key], "Self-loops not allowed."
+
+def compute_in_degrees(digraph, check_loops=True):
     """
     Takes a directed graph digraph (represented as a dictionary)
     and computes the in-degrees for the nodes in the graph. The 
     function should return a dictionary with the same set of
     keys (nodes) as digraph whose corresponding values are the 
     number of edges whose head matches a particular node.
-    """
 
-    for node_key in digraph.keys():
-        assert node_key not in list(digraph[node_key]), "Self-loops not allowed."        
-
-    in_deg_graph = digraph.fromkeys(digraph, 0)
+    The edge heads are counted in a single pass. Pass
+    check_loops=False to skip the self-loop scan; self-loops are
+    then left out of the in-degrees. A head that is not a node of
+    digraph raises a KeyError.
+    """
+    if check_loops:
+        check_self_loops(digraph)
 
-    for node_key in digraph.keys():
-        for edge_head in list(digraph[node_key]):
-            if edge_head != node_key:
-                in_deg_graph[edge_head] += 1 
+    in_deg_graph = dict.fromkeys(digraph, 0)
+    head_counts = Counter(edge_head for node_key in digraph for edge_head in digraph[node_key]
+                          if edge_head != node_key)
+    for edge_head, count in head_counts.iteritems():
+        if edge_head not in in_deg_graph:
+            raise KeyError(edge_head)
+        in_deg_graph[edge_head] = count
 
     return in_deg_graph
 
-def in_degree_distribution(digraph):
+def in_degree_distribution(digraph, check_loops=True):
     """
     Takes a directed graph digraph (represented as a dictionary)
     and computes the unnormalized distribution of the in-degrees of
@@ -91,26 +105,11 @@ def in_degree_distribution(digraph):
     with each particular in-degree is the number of nodes with that
     in-degree. In-degrees with no corresponding nodes in the graph
     are not included in the dictionary.
-    """
-
-    for node_key in digraph.keys():
-        assert node_key not in list(digraph[node_key]), "Self-loops not allowed."
 
-    distribution_graph = {}
-
-    # Compute list of in-degrees in digraph.
-    in_deg_graph = compute_in_degrees(digraph)
-    in_deg_values = sorted(in_deg_graph.values())
-    
-    # Set in-degrees as keys of distribution_graph.
-    for in_deg in list(set(in_deg_values)):
-        distribution_graph[in_deg] = 0
-
-    # Set each key value in distribution_graph as number of nodes in digraph with that in-degree.
-    for in_deg_key in distribution_graph.keys():
-        distribution_graph[in_deg_key] = in_deg_values.count(in_deg_key)
-
-    return distribution_graph 
+    Pass check_loops=False to skip the self-loop scan.
+    """
+    in_deg_graph = compute_in_degrees(digraph, check_loops)
+    return dict(Counter(in_deg_graph.itervalues()))
 
 ###########################################################################
 
@@ -158,6 +157,17 @@ class TestSuite(unittest.TestCase):
     def test_in_degree_distribution_2(self):
         self.assertEqual(in_degree_distribution(EX_GRAPH2), {0: 2, 1: 1, 2: 3, 3: 4})
 
+    def test_in_degree_distribution_3(self):
+        self.assertEqual(in_degree_distribution(EX_GRAPH2, check_loops=False), {0: 2, 1: 1, 2: 3, 3: 4})
+
+    # Testcases for check_self_loops
+
+    def test_check_self_loops(self):
+        self.assertRaises(AssertionError, check_self_loops, {0: set([0, 1]), 1: set([])})
+        self.assertRaises(AssertionError, in_degree_distribution, {0: set([0, 1]), 1: set([])})
+        self.assertEqual(compute_in_degrees({0: set([0, 1]), 1: set([])}, check_loops=False), {0: 0, 1: 1})
+        self.assertRaises(KeyError, compute_in_degrees, {0: set([1, 7]), 1: set([])})
+
 ###########################################################################
 
 # suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
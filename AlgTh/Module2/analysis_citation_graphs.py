@@ -12,11 +12,16 @@ Last updated: 2/23/2018
 """
 
 import unittest
-import urllib2
 import matplotlib.pyplot as plt
 import math
 import random
 import degree_distributions_for_graphs as project
+import degree_binning
+import degree_stats
+import graph_generators
+import graph_io
+import pagerank
+from csr_graph import CSRGraph
 
 ################### Provided code ######################
 
@@ -24,27 +29,15 @@ CITATION_URL = "http://storage.googleapis.com/codeskulptor-alg/alg_phys-cite.txt
 
 def load_graph(graph_url):
     """
-    Function that loads a graph given the URL
-    for a text representation of the graph
+    Function that loads a graph given the URL (or a local,
+    optionally gzip-compressed, path) for a text representation
+    of the graph
     
-    Returns a dictionary that models a graph
+    Returns a CSRGraph that models a graph. The parsed graph is kept
+    in a binary cache (see graph_io.default_cache_dir), so later runs
+    reopen it without downloading or parsing the text again.
     """
-    graph_file = urllib2.urlopen(graph_url)
-    graph_text = graph_file.read()
-    graph_lines = graph_text.split('\n')
-    graph_lines = graph_lines[ : -1]
-    
-    print "Loaded graph with", len(graph_lines), "nodes"
-    
-    answer_graph = {}
-    for line in graph_lines:
-        neighbors = line.split(' ')
-        node = int(neighbors[0])
-        answer_graph[node] = set([])
-        for neighbor in neighbors[1 : -1]:
-            answer_graph[node].add(int(neighbor))
-
-    return answer_graph
+    return graph_io.load_graph(graph_url, cache_dir=graph_io.default_cache_dir(graph_url))
 
 class DPATrial:
     """
@@ -101,14 +94,28 @@ CITATION_GRAPH = load_graph(CITATION_URL)
 
 ################### My code ######################
 
-def question1(citation_graph):
+def question1(citation_graph, binned=False):
     """
     This function:
     1) Computes the in-degree distribution for citation_graph.
     2) Normalizes the in-degree distribution.
     3) Prints a log/log plot of the points in the normalized distribution.
+    If binned is True, plots the log-binned distribution instead
+    (see plot_log_binned).
+    """
+    if binned:
+        plot_log_binned(degree_binning.in_degree_array(citation_graph), 'ro',
+                        "Question 1: Log-Binned Distribution of Citations")
+        return
+    plot_in_degree_distribution(project.in_degree_distribution(citation_graph))
+
+def plot_in_degree_distribution(in_deg_dist):
+    """
+    Normalizes the in-degree distribution in_deg_dist and prints the
+    log/log plot of question1. The distribution may also come from a
+    degree_tracker.InDegreeTracker kept up to date with new citations,
+    so the plot can be refreshed without reprocessing the whole graph.
     """
-    in_deg_dist = project.in_degree_distribution(citation_graph)
     total_nodes = float(sum(in_deg_dist.values()))
     x_vals = in_deg_dist.keys()
     y_vals = [y / total_nodes for y in in_deg_dist.values()]
@@ -119,34 +126,51 @@ def question1(citation_graph):
     plt.axis([10**0,10**4,10**-5,10**0])
     plt.show()
 
-def question3(citation_graph):
+def question3(graph_url):
     """
     This function prints the number of nodes and 
-    average out-degree of the citation_graph.
+    average out-degree of the graph at graph_url, streamed
+    once by degree_stats without loading the graph.
     """
-    num_nodes = len(citation_graph)
-    num_values = float(sum(len(val) for val in citation_graph.values()))
+    stats = degree_stats.degree_stats(graph_url)
+    num_nodes = stats["nodes"]
+    num_values = float(stats["edges"])
     avg_out_deg = num_values / num_nodes
     print "Number of nodes:", num_nodes
     print "Number of values:", num_values
     print "Average out-degree:", avg_out_deg, "or", math.ceil(avg_out_deg)
+    print "Maximum in-degree:", stats["max_in_degree"]
+    print "Self-loops:", stats["self_loops"]
 
 def num_nodes_and_edges(graph_url):
     """
     This function prints the combined total number of nodes and edges.
     Used to compare with output of question3 function.
     """
-    graph_file = urllib2.urlopen(graph_url)
-    graph_text = graph_file.read()
-    graph_lines = graph_text.split('\n')
- 
-    num_items = 0
-    for line in graph_lines:
-        wordlist = line.split()
-        num_items += len(wordlist)
-    print num_items
+    stats = degree_stats.degree_stats(graph_url)
+    print stats["nodes"] + stats["edges"]
+
+def plot_log_binned(in_degrees, style, title, show_ccdf=False):
+    """
+    Prints a log/log plot of the log-binned distribution of the array
+    of in-degrees in_degrees. Only a few points per decade are drawn,
+    so the plot stays fast for graphs with millions of nodes. Pass
+    show_ccdf=True to overlay the CCDF, which has one point per
+    distinct in-degree.
+    """
+    centers, densities = degree_binning.log_binned_distribution(in_degrees)
+    plt.loglog(centers, densities, style, label='Log-binned distribution')
+    if show_ccdf:
+        values, fractions = degree_binning.ccdf(in_degrees)
+        positive = values > 0
+        plt.loglog(values[positive], fractions[positive], style[0] + '-', label='CCDF')
+    plt.title(title)
+    plt.xlabel("In Degree (Log)")
+    plt.ylabel("Fraction of Nodes (Log)")
+    plt.legend(loc='upper right')
+    plt.show()
 
-def question4(num_final_nodes,num_existing_nodes):
+def question4(num_final_nodes,num_existing_nodes, binned=False):
     """
     This function:
     1) Implements DPA algorithm.
@@ -154,15 +178,19 @@ def question4(num_final_nodes,num_existing_nodes):
     and a fixed number of existing nodes to which a new node is connected
     during each iteration, num_existing_nodes.
     3) Plots the in-degree distribution for the DPA graph.
+    If binned is True, the graph is built directly in CSR form and
+    its log-binned distribution is plotted instead.
     """
 
-    # Make a complete graph on num_existing_nodes
-    graph = project.make_complete_graph(num_existing_nodes)
-    
-    # Implement DPA algorithm and computes DPA graph
-    DPATrial_graph = DPATrial(num_existing_nodes)
-    for node in range(num_existing_nodes, num_final_nodes):
-        graph[node] = DPATrial_graph.run_trial(num_existing_nodes)
+    # Implement DPA algorithm and computes DPA graph, starting from a
+    # complete graph on num_existing_nodes
+    edges = graph_generators.dpa_edges(num_final_nodes, num_existing_nodes)
+    if binned:
+        graph = CSRGraph.from_edges(num_final_nodes, edges, directed=True)
+        plot_log_binned(degree_binning.in_degree_array(graph), 'go',
+                        "Question 4: Log-Binned In-Degree Distribution of DPA Graph")
+        return
+    graph = graph_generators.edges_to_dict(num_final_nodes, edges, directed=True)
 
     # Computes in-degree distribution of graph, normalizes it, and prints plot
     in_deg_dist = project.in_degree_distribution(graph)
@@ -175,15 +203,30 @@ def question4(num_final_nodes,num_existing_nodes):
     plt.ylabel("Normalized Distribution of Nodes (Log)")
     plt.show()
 
+def citation_pagerank(citation_graph, num_papers=10):
+    """
+    This function:
+    1) Computes the PageRank of every paper in citation_graph.
+    2) Prints the residual of each power iteration.
+    3) Prints the num_papers highest-ranked papers with their in-degrees.
+    """
+    ranks, residuals = pagerank.pagerank(citation_graph)
+    for iteration, residual in enumerate(residuals):
+        print "Iteration", iteration + 1, "residual", residual
+    in_degrees = project.compute_in_degrees(citation_graph, check_loops=False)
+    for paper, rank in pagerank.top_ranked(citation_graph, ranks, num_papers):
+        print "Paper", paper, "rank", rank, "citations", in_degrees[paper]
+
     
     
 
 ################### Calls to functions ######################
 
 question1(CITATION_GRAPH)
-question3(CITATION_GRAPH)
+question3(CITATION_URL)
 # num_nodes_and_edges(CITATION_URL)
 question4(27770,13)
+# citation_pagerank(CITATION_GRAPH)
 
 
 
@@ -25,12 +25,17 @@ Last Updated: 3/5/2018
 
 # Imports
 
-from itertools import combinations
-import random
 import unittest
 import provided_code as provided
+import attack_orders
 import degree_distributions_for_graphs as project1
 import cc_and_graph_resilience as project2
+import betweenness
+import degree_buckets
+import graph_generators
+import graph_io
+import resilience_ensemble
+import triangles
 import matplotlib.pyplot as plt
 import time
 import gc
@@ -45,47 +50,38 @@ def make_computer_network_graph():
     """
     Loads the text representation for the example network as an 
     undirected graph (with 1239 nodes and 3047 edges).
+
+    The graph is returned as a CSRGraph kept in a binary cache (see
+    graph_io.default_cache_dir), so each question reopens it without
+    downloading or parsing the text again.
     """
-    return provided.load_graph(NETWORK_URL)
+    return graph_io.load_graph(NETWORK_URL, cache_dir=graph_io.default_cache_dir(NETWORK_URL))
 
-def make_ER_graph(num_nodes, probability):
+def make_ER_graph(num_nodes, probability, seed=None):
     """
     Takes the number of nodes num_nodes and probability
     and returns a dictionary corresponding to a 
     randomly generated undirected graph with the 
     specified number of nodes. Self-loops are not allowed.
+
+    The edges come from graph_generators.er_edges, which skips
+    geometrically between accepted pairs instead of testing every
+    pair, so the running time is proportional to the edges produced.
     """
-    graph = {}
-    nodes = set(list(range(num_nodes)))
-    for node in nodes:
-        graph[node] = set([])
-    for (nodei, nodej) in combinations(nodes, 2):
-        if nodei != nodej:
-            random_decimal = float(random.randrange(0, 1000)) / 1000
-            if random_decimal < probability:
-                graph[nodei].add(nodej)
-                graph[nodej].add(nodei)
-    for node in graph.keys():
-        assert node not in list(graph[node]), "Self-loops not allowed"
-    return graph
-
-def make_UPA_graph(num_final_nodes, num_existing_nodes):
+    return graph_generators.edges_to_dict(num_nodes, graph_generators.er_edges(num_nodes, probability, seed))
+
+def make_UPA_graph(num_final_nodes, num_existing_nodes, seed=None):
     """
     This function:
     1) Implements UPA algorithm.
     2) Computes UPA graph using the final number of nodes, num_final_nodes,
     and a fixed number of existing nodes to which a new node is connected
     during each iteration, num_existing_nodes.
+
+    The trials are run by the array-backed graph_generators.PATrial.
     """
-    # Make a complete graph on num_existing_nodes
-    graph = project1.make_complete_graph(num_existing_nodes)
-    # Implement UPA algorithm 
-    UPATrial_graph = provided.UPATrial(num_existing_nodes)
-    for node in range(num_existing_nodes, num_final_nodes):
-        graph[node] = UPATrial_graph.run_trial(num_existing_nodes)
-        for edge in graph[node]:
-            graph[edge].add(node)
-    return graph
+    edges = graph_generators.upa_edges(num_final_nodes, num_existing_nodes, seed)
+    return graph_generators.edges_to_dict(num_final_nodes, edges)
 
 #################################################################################
 
@@ -106,10 +102,9 @@ def get_num_edges(ugraph):
 def random_order(graph):
     """
     Takes a graph and returns a list of nodes in the graph in some random order.
+    The order comes from attack_orders.random_order.
     """
-    keys = graph.keys()
-    random.shuffle(keys)
-    return keys
+    return list(attack_orders.random_order(graph))
 
 def get_degree_sets(graph):
     """
@@ -127,31 +122,28 @@ def get_degree_sets(graph):
 def fast_targeted_order(graph):
     """
     Returns a list of the nodes in graph in decreasing order of their degrees.
+
+    Nodes are held in a bucket queue of flat arrays sorted by degree
+    (see degree_buckets). Deleting the node of maximum degree moves
+    each of its neighbors down one bucket, so the graph is never
+    copied and the whole order takes O(n + m) time.
     """
-    # copy the graph
-    new_graph = provided.copy_graph(graph)
+    return degree_buckets.max_degree_order(graph)
 
-    num_nodes = len(new_graph.keys())
-    degree_sets = get_degree_sets(graph)
-    order = []
-    
-    # Iterates through the list degree_sets in order of
-    # decreasing degree. When this method encounters a
-    # non-empty set, the nodes in this set must be of 
-    # maximum degree. This method then repeatedly chooses
-    # an arbitrary node, arb_node, from this set, 
-    # deletes arb_node from the graph, and updates degree_sets appropriately.
-    for node in range((num_nodes - 1), -1, -1):
-        while len(degree_sets[node]) > 0:
-            arb_node = degree_sets[node].pop()
-            for neighbor in new_graph[arb_node]:
-                deg = len(new_graph[neighbor])
-                degree_sets[deg].remove(neighbor)
-                degree_sets[deg - 1].add(neighbor)
-            order.append(arb_node)
-            provided.delete_node(new_graph, arb_node)
-
-    return order
+def core_targeted_order(graph):
+    """
+    Returns a list of the nodes in graph in decreasing order of
+    their k-core numbers, computed with the same bucket queue.
+    """
+    return degree_buckets.core_targeted_order(graph)
+
+def betweenness_targeted_order(graph, recompute_every=10, seed=None):
+    """
+    Returns a list of the nodes in graph as an adaptive attack that
+    repeatedly removes the recompute_every nodes of highest estimated
+    betweenness and then re-estimates it on the remaining graph.
+    """
+    return list(betweenness.betweenness_attack_order(graph, recompute_every, seed=seed))
 
 def timer(a_func, arg):
     """
@@ -211,6 +203,46 @@ def question1():
     plt.legend(loc='upper right')
     plt.show()
 
+def question1_ensemble(num_trials=100, seed=None):
+    """
+    Repeats question 1 with num_trials random attacks per graph, run
+    in parallel by resilience_ensemble, and plots the mean resilience
+    of each graph with a band from the 5th to the 95th percentile.
+    """
+    graphs = [(make_ER_graph(1239, .004, seed), '-b', 'ER Graph (p=.004)'),
+              (make_UPA_graph(1239, 3, seed), '-r', 'UPA Graph (m=3)'),
+              (make_computer_network_graph(), '-g', 'Computer Network')]
+
+    plt.title("Question 1: Mean Resilience over " + str(num_trials) + " Random Attacks")
+    plt.xlabel("Number of Nodes Removed")
+    plt.ylabel("Size of Largest Connected Component")
+
+    for graph, style, label in graphs:
+        summary = resilience_ensemble.resilience_ensemble(graph, num_trials, seed)
+        xvals = range(len(summary["mean"]))
+        plt.plot(xvals, summary["mean"], style, label=label)
+        plt.fill_between(xvals, summary["percentiles"][5], summary["percentiles"][95],
+                         color=style[-1], alpha=0.2)
+    plt.grid(which='major', axis='both')
+    plt.legend(loc='upper right')
+    plt.show()
+
+def clustering_comparison(seed=None):
+    """
+    Counts the triangles of the computer network and of ER and UPA
+    graphs of the same size, and prints the number of edges and
+    triangles and the average and global clustering coefficients of
+    each graph.
+    """
+    graphs = [('ER Graph (p=.004)', make_ER_graph(1239, .004, seed)),
+              ('UPA Graph (m=3)', make_UPA_graph(1239, 3, seed)),
+              ('Computer Network', make_computer_network_graph())]
+    for label, graph in graphs:
+        summary = triangles.clustering_summary(graph)
+        print label + ":", get_num_edges(graph), "edges,", summary["triangles"], "triangles,",
+        print "average clustering %.4f, transitivity %.4f" % (summary["average_clustering"],
+                                                              summary["transitivity"])
+
 def question3():
     """
     Analyze the running time of targeted_order and fast_targeted_order on 
@@ -242,6 +274,25 @@ def question3():
     plt.legend(loc='upper right')
     plt.show()
 
+def question3_scaling(max_exponent=7):
+    """
+    Times the random, static-degree and adaptive-degree attack orders
+    of attack_orders on UPA graphs with m = 5 and 10**3 up to
+    10**max_exponent nodes, and plots the running times on a log/log
+    plot. targeted_order is left out, as it is quadratic.
+    """
+    sizes = [10 ** exponent for exponent in range(3, max_exponent + 1)]
+    results = attack_orders.benchmark(sizes, 5)
+
+    plt.title("Running Times of Attack Orders on UPA Graphs (m = 5)")
+    plt.xlabel("Number of Nodes n")
+    plt.ylabel("Running Time (seconds)")
+    for strategy, style in [('random', '-g'), ('static_degree', '-b'), ('adaptive_degree', '-r')]:
+        plt.loglog(sizes, [row[strategy] for row in results], style, label=strategy)
+    plt.grid(which='major', axis='both')
+    plt.legend(loc='upper left')
+    plt.show()
+
 def question4():
     """
     This function:
@@ -330,7 +381,10 @@ class TestSuite(unittest.TestCase):
 # Calls to Functions
 
 # question1()
+# question1_ensemble()
+# clustering_comparison()
 # gc.disable()
 # question3()
 # gc.enable()
+# question3_scaling()
 # question4()
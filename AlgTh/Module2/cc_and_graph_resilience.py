@@ -17,8 +17,13 @@ By: Kyle Yasumiishi
 Last Updated: 3/2/2017
 """
 
+import random
 import unittest
+from array import array
+from bisect import bisect_left
 from collections import deque
+from csr_graph import CSRGraph, DeletionOverlay, as_csr
+from union_find import UnionFind
 
 # Breadth-first search
 
@@ -28,21 +33,115 @@ def bfs_visited(ugraph, start_node):
     start_node and returns the set consisting of
     all nodes that are visited by a breadth-first search
     that starts at start_node.
+
+    Compact graphs (CSRGraph or DeletionOverlay) are searched
+    with the array-based bfs_levels.
     """
+    if not isinstance(ugraph, dict):
+        if start_node not in ugraph:
+            return set([start_node])
+        graph = as_csr(ugraph)
+        levels = bfs_levels(graph, [start_node])[1]
+        return set(graph.node(idx) for level in levels for idx in level)
+
     queue = deque()
     visited = set([start_node])
     queue.appendleft(start_node)
     while len(queue) > 0:
         current_node = queue.pop()
-        if current_node in ugraph.keys():
+        if current_node in ugraph:
             for neighbor in ugraph[current_node]:
                 if neighbor not in visited:
                     visited.add(neighbor)
                     queue.appendleft(neighbor)
     return visited
 
+def bfs_levels(ugraph, start_nodes):
+    """
+    Takes the undirected graph ugraph and an iterable of nodes
+    start_nodes and runs a level-synchronous breadth-first search
+    from all of them at once. Returns a tuple (distances, levels)
+    where distances is an array whose ith entry is the distance from
+    the nearest start node to the node with dense id i (-1 if it is
+    not reached) and levels is a list whose kth entry is an array of
+    the dense ids at distance k. Deleted start nodes are ignored.
+    """
+    graph = as_csr(ugraph)
+    distances = array('i', [-1]) * graph.num_ids()
+    removed = graph.removed_mask()
+    frontier = array('i')
+    for node in start_nodes:
+        idx = graph.node_id(node)
+        if distances[idx] == -1 and not (removed and removed[idx]):
+            distances[idx] = 0
+            frontier.append(idx)
+
+    # distances doubles as the visited array; each level is expanded in one sweep
+    levels = []
+    depth = 0
+    while frontier:
+        levels.append(frontier)
+        depth += 1
+        next_frontier = array('i')
+        for idx in frontier:
+            for neighbor in graph.neighbor_ids(idx):
+                if distances[neighbor] == -1:
+                    distances[neighbor] = depth
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances, levels
+
+def eccentricity(ugraph, node):
+    """
+    Takes the undirected graph ugraph and a node and returns the
+    greatest distance from node to any node in its component
+    """
+    return len(bfs_levels(ugraph, [node])[1]) - 1
+
+def distance_profile(ugraph, start_nodes):
+    """
+    Takes the undirected graph ugraph and an iterable of nodes
+    start_nodes and returns a list whose kth entry is the number of
+    nodes at distance k from the nearest start node
+    """
+    return [len(level) for level in bfs_levels(ugraph, start_nodes)[1]]
+
 # Connected components
 
+def cc_labels(ugraph):
+    """
+    Takes the undirected graph ugraph and labels its connected
+    components in a single pass that visits each node and edge once.
+    Returns a tuple (labels, sizes) where labels is an array whose
+    ith entry is the component of the node with dense id i (the ith
+    node in the iteration order of a dictionary), or -1 if that node
+    was deleted from a DeletionOverlay, and sizes is a list whose jth
+    entry is the number of nodes in component j. Components are
+    numbered in the order in which their first node is reached.
+    """
+    graph = as_csr(ugraph)
+    num_nodes = graph.num_ids()
+    removed = graph.removed_mask()
+    labels = array('i', [-1]) * num_nodes
+    sizes = []
+    queue = deque()
+    for start_idx in xrange(num_nodes):
+        if labels[start_idx] != -1 or (removed and removed[start_idx]):
+            continue
+        label = len(sizes)
+        labels[start_idx] = label
+        size = 1
+        queue.append(start_idx)
+        while queue:
+            current_idx = queue.popleft()
+            for neighbor in graph.neighbor_ids(current_idx):
+                if labels[neighbor] == -1:
+                    labels[neighbor] = label
+                    size += 1
+                    queue.append(neighbor)
+        sizes.append(size)
+    return labels, sizes
+
 def cc_visited(ugraph):
     """
     Takes the undirected graph ugraph and returns
@@ -51,15 +150,12 @@ def cc_visited(ugraph):
     and there is exactly one set in the list for each 
     connected componenent in ugraph and nothing else.
     """
-    remaining_nodes = ugraph.keys()
-    connected_components = []
-    while len(remaining_nodes) > 0:
-        for node in remaining_nodes:
-            visited_nodes = bfs_visited(ugraph, node)
-            connected_components.append(visited_nodes)
-            for visited_node in visited_nodes:
-                if visited_node in remaining_nodes:
-                    remaining_nodes.remove(visited_node)
+    graph = as_csr(ugraph)
+    labels, sizes = cc_labels(graph)
+    connected_components = [set() for dummy_idx in range(len(sizes))]
+    for idx in xrange(graph.num_ids()):
+        if labels[idx] != -1:
+            connected_components[labels[idx]].add(graph.node(idx))
     return connected_components
 
 def largest_cc_size(ugraph):
@@ -68,12 +164,8 @@ def largest_cc_size(ugraph):
     size (an integer) of the largest connect component
     in ugraph.
     """
-    largest_cc = 0
-    connected_components = cc_visited(ugraph)
-    for connected_component in connected_components:
-        if len(connected_component) > largest_cc:
-            largest_cc = len(connected_component)
-    return largest_cc
+    sizes = cc_labels(ugraph)[1]
+    return max(sizes) if sizes else 0
 
 # Graph resilience
 
@@ -90,17 +182,213 @@ def compute_resilience(ugraph, attack_order):
     after the removal of the first k nodes in attack_order.
     The first entry (indexed by zero) is the size of the largest
     connected component in the original graph. 
+
+    The graph is not modified. Rather than recomputing the largest
+    connected component after every removal, the attacked nodes are
+    added back in reverse order into a union-find structure that
+    tracks component sizes, so the whole curve takes near-linear time.
+    ugraph may be a DeletionOverlay, in which case nodes already
+    deleted from it are treated as absent.
     """
-    largest_cc_list = []
-    largest_cc_list.append(largest_cc_size(ugraph))
+    graph = as_csr(ugraph)
+    num_nodes = graph.num_ids()
+
+    # Dense ids of the attacked nodes, in attack order, without repeats
+    removed = bytearray(graph.removed_mask() or num_nodes)
+    removal_order = []
     for node in attack_order:
-        if node in ugraph:
-            # Remove node and edges from graph
-            for edge in ugraph[node]:
-                ugraph[edge] = set([val for val in ugraph[edge] if val != node])
-            del ugraph[node]
-            # Appends size of largest cc to largest_cc_list
-            largest_cc_list.append(largest_cc_size(ugraph))
+        if node in graph:
+            idx = graph.node_id(node)
+            if not removed[idx]:
+                removed[idx] = 1
+                removal_order.append(idx)
+
+    # Add nodes back into the graph, starting with those never attacked
+    components = UnionFind(num_nodes)
+    active = bytearray(num_nodes)
+    largest_cc = 0
+    for idx in xrange(num_nodes):
+        if not removed[idx]:
+            largest_cc = max(largest_cc, _add_node(graph, components, active, idx))
+    largest_cc_list = [largest_cc]
+    for idx in reversed(removal_order):
+        largest_cc = max(largest_cc, _add_node(graph, components, active, idx))
+        largest_cc_list.append(largest_cc)
+    largest_cc_list.reverse()
+    return largest_cc_list
+
+def _add_node(graph, components, active, idx):
+    """
+    Marks the node with dense id idx as active, merges it
+    with its active neighbors in components and returns the
+    size of the connected component that now contains it.
+    """
+    active[idx] = 1
+    size = 1
+    for neighbor in graph.neighbor_ids(idx):
+        if active[neighbor]:
+            size = components.union(idx, neighbor)
+    return size
+
+# Link resilience
+
+def _arc_arrays(graph):
+    """
+    Returns the offsets and neighbors arrays of graph,
+    or of the base graph of a DeletionOverlay
+    """
+    if isinstance(graph, DeletionOverlay):
+        graph = graph.base_graph()
+    return graph.arrays()[1:]
+
+def _arc_position(offsets, neighbors, tail, head):
+    """
+    Returns the position in neighbors of the arc from
+    dense id tail to dense id head, or -1 if there is none
+    """
+    start, end = offsets[tail], offsets[tail + 1]
+    pos = bisect_left(neighbors, head, start, end)
+    if pos < end and neighbors[pos] == head:
+        return pos
+    return -1
+
+def _edge_ids(graph):
+    """
+    Lazily yields each edge of the compact graph once,
+    as a pair of dense ids with the lower id first
+    """
+    removed = graph.removed_mask()
+    for idx in xrange(graph.num_ids()):
+        if removed and removed[idx]:
+            continue
+        for neighbor in graph.neighbor_ids(idx):
+            if neighbor > idx:
+                yield idx, neighbor
+
+def edge_order(ugraph):
+    """
+    Takes the undirected graph ugraph and lazily yields each
+    of its edges once as a pair of nodes
+    """
+    graph = as_csr(ugraph)
+    for tail, head in _edge_ids(graph):
+        yield graph.node(tail), graph.node(head)
+
+def lazy_permutation(num_items, seed=None):
+    """
+    Lazily yields the integers 0..num_items-1 in a random order
+    drawn from seed. The permutation is held in a typed array and
+    shuffled one step ahead of the caller, so stopping early skips
+    the rest of the shuffle.
+    """
+    permutation = array('i', xrange(num_items))
+    rng = random.Random(seed)
+    for pos in xrange(num_items):
+        swap = rng.randint(pos, num_items - 1)
+        permutation[pos], permutation[swap] = permutation[swap], permutation[pos]
+        yield permutation[pos]
+
+def _random_edge_ids(graph, seed):
+    """
+    Lazily yields each edge of the compact graph once, as a pair
+    of dense ids, in a random order drawn from seed
+    """
+    tails = array('i')
+    heads = array('i')
+    for tail, head in _edge_ids(graph):
+        tails.append(tail)
+        heads.append(head)
+    for pos in lazy_permutation(len(tails), seed):
+        yield tails[pos], heads[pos]
+
+def random_edge_order(ugraph, seed=None):
+    """
+    Takes the undirected graph ugraph and lazily yields each of
+    its edges once, in a random order drawn from seed (see
+    lazy_permutation). The edges are held in two typed arrays.
+    """
+    graph = as_csr(ugraph)
+    for tail, head in _random_edge_ids(graph, seed):
+        yield graph.node(tail), graph.node(head)
+
+def compute_edge_resilience(ugraph, attack_edges):
+    """
+    Takes the undirected graph ugraph and an iterable of edges
+    attack_edges, given as pairs of nodes, and returns a list
+    whose k + 1th entry is the size of the largest connected
+    component after the removal of the first k edges in
+    attack_edges. Pairs that are not edges of the graph, or that
+    were already removed, are skipped. An edge stored in only one
+    direction raises a ValueError, as ugraph is then not undirected.
+
+    attack_edges may be a generator (see random_edge_order, or
+    betweenness.edge_betweenness_order for cuts by decreasing edge
+    betweenness); it is
+    read once, and the attacked edges are kept as dense ids in typed
+    arrays. As in compute_resilience, the graph is not modified and
+    the edges are added back in reverse order into a union-find, so
+    the whole curve takes near-linear time.
+    """
+    return _edge_resilience(as_csr(ugraph), attack_edges, True)
+
+def random_edge_resilience(ugraph, seed=None):
+    """
+    Takes the undirected graph ugraph and returns its resilience
+    under the removal of all of its edges in the order
+    random_edge_order(ugraph, seed). The order never leaves dense
+    ids, so no node key is looked up along the way.
+    """
+    graph = as_csr(ugraph)
+    return _edge_resilience(graph, _random_edge_ids(graph, seed), False)
+
+def _edge_resilience(graph, attack_edges, by_key):
+    """
+    Computes compute_edge_resilience on the compact graph. The
+    attacked edges are pairs of nodes if by_key is True, and
+    otherwise pairs of dense ids of remaining nodes.
+    """
+    num_nodes = graph.num_ids()
+    removed = graph.removed_mask()
+    offsets, neighbors = _arc_arrays(graph)
+
+    # Mark both arcs of every attacked edge, in attack order, without repeats
+    cut = bytearray(len(neighbors))
+    tails = array('i')
+    heads = array('i')
+    for tail, head in attack_edges:
+        if by_key:
+            if tail not in graph or head not in graph:
+                continue
+            tail, head = graph.node_id(tail), graph.node_id(head)
+        pos = _arc_position(offsets, neighbors, tail, head)
+        if pos == -1 or cut[pos]:
+            continue
+        reverse = _arc_position(offsets, neighbors, head, tail)
+        if reverse == -1:
+            raise ValueError("Edge " + repr((graph.node(tail), graph.node(head))) +
+                             " has no reverse arc.")
+        cut[pos] = 1
+        cut[reverse] = 1
+        tails.append(tail)
+        heads.append(head)
+
+    # Merge the edges that are never attacked
+    components = UnionFind(num_nodes)
+    largest_cc = 0
+    for idx in xrange(num_nodes):
+        if removed and removed[idx]:
+            continue
+        largest_cc = max(largest_cc, 1)
+        for pos in xrange(offsets[idx], offsets[idx + 1]):
+            neighbor = neighbors[pos]
+            if neighbor > idx and not cut[pos] and not (removed and removed[neighbor]):
+                largest_cc = max(largest_cc, components.union(idx, neighbor))
+
+    largest_cc_list = [largest_cc]
+    for step in xrange(len(tails) - 1, -1, -1):
+        largest_cc = max(largest_cc, components.union(tails[step], heads[step]))
+        largest_cc_list.append(largest_cc)
+    largest_cc_list.reverse()
     return largest_cc_list
 
 ##############################################################
@@ -146,10 +434,35 @@ class TestSuite(unittest.TestCase):
         self.assertEqual(bfs_visited(GRAPH5, "dog"), set(["dog", "cat"]))
         self.assertEqual(bfs_visited(GRAPH5, "banana"), set(["banana", "ape", "monkey"]))
 
+    def test_bfs_visited_compact(self):
+        graph = CSRGraph.from_dict(UGRAPH_1)
+        self.assertEqual(bfs_visited(graph, 0), set([0,1,2,4,5]))
+        self.assertEqual(bfs_visited(graph, 3), set([3]))
+        self.assertEqual(bfs_visited(CSRGraph.from_dict(GRAPH5), "banana"), set(["banana", "ape", "monkey"]))
+
+    # Testcases for bfs_levels
+    def test_bfs_levels(self):
+        distances, levels = bfs_levels(UGRAPH_1, [2])
+        self.assertEqual(list(distances), [1, 2, 0, -1, 3, 4, -1])
+        self.assertEqual([sorted(level) for level in levels], [[2], [0], [1], [4], [5]])
+        distances, levels = bfs_levels(GRAPH0, [0, 3])
+        self.assertEqual(list(distances), [0, 1, 1, 0])
+        self.assertEqual(distance_profile(GRAPH0, [0, 3]), [2, 2])
+        self.assertEqual(eccentricity(GRAPH0, 1), 2)
+        self.assertEqual(eccentricity(UGRAPH_1, 3), 0)
+        self.assertEqual(bfs_levels(UGRAPH_1, []), (array('i', [-1] * 7), []))
+
     # Testcases for cc_visited
     def test_cc_visited(self):
         self.assertEqual(cc_visited(GRAPH5), [set(["banana", "ape", "monkey"]), set(["dog", "cat"])])
-        self.assertEqual(cc_visited(UGRAPH_1), [set([0,1,2,4,5]), set([6]), set([3])])
+        self.assertEqual(cc_visited(UGRAPH_1), [set([0,1,2,4,5]), set([3]), set([6])])
+        self.assertEqual(cc_visited({}), [])
+
+    # Testcases for cc_labels
+    def test_cc_labels(self):
+        labels, sizes = cc_labels(UGRAPH_1)
+        self.assertEqual(list(labels), [0, 0, 0, 1, 0, 0, 2])
+        self.assertEqual(sizes, [5, 1, 1])
 
     # Testcases for largest_cc_size
     def test_largest_cc_size(self):
@@ -157,6 +470,7 @@ class TestSuite(unittest.TestCase):
         ugraph_1_copy = dict(UGRAPH_1)
         self.assertEqual(largest_cc_size(GRAPH5_copy), 3)
         self.assertEqual(largest_cc_size(ugraph_1_copy), 5)
+        self.assertEqual(largest_cc_size({}), 0)
 
     # Testcases for compute_resilience
     def test_compute_resilience(self):
@@ -165,10 +479,58 @@ class TestSuite(unittest.TestCase):
         self.assertEqual(compute_resilience(GRAPH5_copy1, ["cat"]), [3, 3])
         self.assertEqual(compute_resilience(GRAPH5_copy2, ["banana"]), [3, 2])
         self.assertEqual(compute_resilience(ugraph_1_copy, [2, 4]), [5, 4, 2])
+        self.assertEqual(compute_resilience(UGRAPH_0, [0, 0, 5, 2, 1, 3]), [4, 3, 1, 1, 0])
+        self.assertEqual(compute_resilience(UGRAPH_1, []), [5])
+        self.assertEqual(UGRAPH_1[1], set([0, 4]))
+
+    # Testcases for DeletionOverlay views
+    def test_deletion_overlay(self):
+        view = DeletionOverlay(UGRAPH_1)
+        view.delete_node(1)
+        self.assertEqual(bfs_visited(view, 0), set([0, 2]))
+        self.assertEqual(cc_visited(view), [set([0, 2]), set([3]), set([4, 5]), set([6])])
+        self.assertEqual(largest_cc_size(view), 2)
+        self.assertEqual(compute_resilience(view, [1, 0, 4]), [2, 2, 1])
+        self.assertEqual(largest_cc_size(UGRAPH_1), 5)
+
+    # Testcases for compute_edge_resilience
+    def test_compute_edge_resilience(self):
+        self.assertEqual(compute_edge_resilience(GRAPH0, [(1, 2), (2, 1), (0, 3), (0, 1)]),
+                         [4, 2, 2])
+        self.assertEqual(compute_edge_resilience(UGRAPH_0, [(0, 2), (0, 1), (1, 2), (2, 3)]),
+                         [4, 4, 4, 3, 2])
+        self.assertEqual(compute_edge_resilience(GRAPH5, [("banana", "ape"), ("dog", "cat"),
+                                                          ("monkey", "banana")]), [3, 2, 2, 1])
+        self.assertEqual(compute_edge_resilience(GRAPH5, edge_order(GRAPH5))[-1], 1)
+        self.assertEqual(compute_edge_resilience({0: set([])}, []), [1])
+        self.assertRaises(ValueError, compute_edge_resilience,
+                          {0: set([1]), 1: set([]), 2: set([])}, [(0, 1)])
+        view = DeletionOverlay(UGRAPH_1)
+        view.delete_node(1)
+        self.assertEqual(compute_edge_resilience(view, [(4, 5), (0, 1), (0, 2)]), [2, 2, 1])
+
+    def test_random_edge_order(self):
+        edges = list(random_edge_order(UGRAPH_0, seed=3))
+        self.assertEqual(len(edges), 5)
+        self.assertEqual(set(frozenset(edge) for edge in edges),
+                         set(frozenset(edge) for edge in edge_order(UGRAPH_0)))
+        self.assertEqual(edges, list(random_edge_order(UGRAPH_0, seed=3)))
+        self.assertEqual(compute_edge_resilience(UGRAPH_0, random_edge_order(UGRAPH_0))[-1], 1)
+
+    def test_random_edge_resilience(self):
+        self.assertEqual(random_edge_resilience(GRAPH5, seed=3),
+                         compute_edge_resilience(GRAPH5, random_edge_order(GRAPH5, seed=3)))
+        view = DeletionOverlay(UGRAPH_1)
+        view.delete_node(1)
+        self.assertEqual(random_edge_resilience(view, seed=1),
+                         compute_edge_resilience(view, random_edge_order(view, seed=1)))
+        self.assertEqual(random_edge_resilience({0: set([])}), [1])
 
 #############################################################
 
 # Run tests
 
-suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
-unittest.TextTestRunner(verbosity=0).run(suite)
\ No newline at end of file
+# Only when run as a script, as other modules import this one
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+    unittest.TextTestRunner(verbosity=0).run(suite)
@@ -0,0 +1,304 @@
+"""
+Graphs with delta- and varint-encoded neighbor lists.
+
+A CSRGraph spends four bytes on every neighbor id. Sorted neighbor
+lists compress much better: a CompressedGraph stores each list as the
+gaps between successive dense ids, written as variable-length
+integers of seven bits per byte with the high bit marking that more
+bytes follow. Gaps below 128 take one byte and gaps below 16384 take
+two, so citation-like graphs need only a couple of bytes per edge.
+
+Neighbors are decoded lazily while they are iterated over, and only
+the byte offset and the degree of every node are kept unencoded. A
+CompressedGraph offers the same dictionary and dense id interfaces as
+CSRGraph, and csr_graph.as_csr passes it through unchanged, so it can
+be passed directly to bfs_visited, cc_visited, compute_in_degrees and
+the other graph functions. The few that need the raw CSR arrays get a
+decoded copy from arrays().
+"""
+
+import unittest
+from array import array
+from csr_graph import CSRGraph, NEIGHBOR_TYPECODE, OFFSET_TYPECODE, as_csr
+from node_index import NodeIndex
+
+def encode_gaps(ids, data):
+    """
+    Append the sorted integers ids to the bytearray data as varint
+    gaps, the first counted from zero
+    """
+    previous = 0
+    for value in ids:
+        gap = value - previous
+        previous = value
+        while gap >= 0x80:
+            data.append((gap & 0x7f) | 0x80)
+            gap >>= 7
+        data.append(gap)
+
+def decode_gaps(data, start, end):
+    """
+    Yield the integers encoded by encode_gaps in data[start:end]
+    """
+    value = 0
+    shift = 0
+    previous = 0
+    for pos in xrange(start, end):
+        byte = data[pos]
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            previous += value
+            yield previous
+            value = 0
+            shift = 0
+
+class CompressedGraph:
+    """
+    Read-only graph whose neighbor lists are delta/varint encoded
+    """
+
+    def __init__(self, nodes, offsets, degrees, data):
+        """
+        Create a graph from a list of node keys (or a NodeIndex), an
+        array of len(nodes) + 1 byte offsets into data, an array of
+        degrees and the bytearray data of encoded neighbor lists
+        """
+        assert len(offsets) == len(nodes) + 1, "Need one offset per node plus one."
+        self._ids = nodes if isinstance(nodes, NodeIndex) else NodeIndex(nodes)
+        self._offsets = offsets
+        self._degrees = degrees
+        self._data = data
+
+    @classmethod
+    def from_csr(cls, graph):
+        """
+        Encode the neighbor lists of the CSRGraph graph
+        """
+        num_nodes = graph.num_ids()
+        offsets = array(OFFSET_TYPECODE, [0])
+        data = bytearray()
+        for idx in xrange(num_nodes):
+            encode_gaps(graph.neighbor_ids(idx), data)
+            offsets.append(len(data))
+        return cls(graph.node_index(), offsets, graph.degree_ids(), data)
+
+    @classmethod
+    def from_dict(cls, graph):
+        """
+        Build a CompressedGraph from a graph represented as a
+        dictionary. Dense ids follow the iteration order of the
+        dictionary.
+        """
+        return cls.from_csr(CSRGraph.from_dict(graph))
+
+    def to_dict(self):
+        """
+        Return the graph as a dictionary of sets
+        """
+        return dict((node, set(self[node])) for node in self)
+
+    def __repr__(self):
+        """
+        String representation of the graph
+        """
+        return "CompressedGraph(" + str(len(self)) + " nodes, " + \
+               str(self.num_arcs()) + " arcs, " + str(len(self._data)) + " bytes)"
+
+    def bytes_per_arc(self):
+        """
+        Return the average number of encoded bytes per arc
+        """
+        num_arcs = self.num_arcs()
+        return len(self._data) / float(num_arcs) if num_arcs > 0 else 0.0
+
+    # Dictionary-like interface
+
+    def __len__(self):
+        """
+        Number of nodes in the graph
+        """
+        return len(self._ids)
+
+    def __iter__(self):
+        """
+        Iterate over the node keys
+        """
+        return iter(self._ids)
+
+    def __contains__(self, node):
+        """
+        Check whether node is in the graph
+        """
+        return node in self._ids
+
+    def __getitem__(self, node):
+        """
+        Return a list of the neighbors of node
+        """
+        nodes = self._ids.nodes()
+        return [nodes[head] for head in self.neighbor_ids(self._ids.node_id(node))]
+
+    def keys(self):
+        """
+        Return a list of the node keys
+        """
+        return list(self._ids)
+
+    def values(self):
+        """
+        Return a list of neighbor lists, one per node
+        """
+        return [self[node] for node in self]
+
+    def items(self):
+        """
+        Return a list of (node, neighbor list) pairs
+        """
+        return [(node, self[node]) for node in self]
+
+    def degree(self, node):
+        """
+        Return the out-degree of node
+        """
+        return self._degrees[self._ids.node_id(node)]
+
+    # Dense id interface
+
+    def arrays(self):
+        """
+        Return the tuple (nodes, offsets, neighbors) of the graph in
+        CSR form. The neighbors are a decoded copy.
+        """
+        neighbors = array(NEIGHBOR_TYPECODE)
+        offsets = array(OFFSET_TYPECODE, [0])
+        for idx in xrange(len(self._ids)):
+            neighbors.extend(self.neighbor_ids(idx))
+            offsets.append(len(neighbors))
+        return self._ids.nodes(), offsets, neighbors
+
+    def to_csr(self):
+        """
+        Return the graph decoded into a CSRGraph
+        """
+        offsets, neighbors = self.arrays()[1:]
+        return CSRGraph(self._ids, offsets, neighbors)
+
+    def num_arcs(self):
+        """
+        Number of stored arcs. Each undirected edge is stored twice.
+        """
+        return sum(self._degrees)
+
+    def num_ids(self):
+        """
+        Number of dense ids
+        """
+        return len(self._ids)
+
+    def removed_mask(self):
+        """
+        Return None, as nothing is ever deleted from a CompressedGraph
+        """
+        return None
+
+    def node(self, idx):
+        """
+        Return the key of the node with dense id idx
+        """
+        return self._ids.node(idx)
+
+    def node_id(self, node):
+        """
+        Return the dense id of node
+        """
+        return self._ids.node_id(node)
+
+    def node_index(self):
+        """
+        Return the NodeIndex interning the node keys
+        """
+        return self._ids
+
+    def neighbor_ids(self, idx):
+        """
+        Return an iterator over the dense ids of the neighbors of
+        the node with dense id idx, decoded lazily
+        """
+        return decode_gaps(self._data, self._offsets[idx], self._offsets[idx + 1])
+
+    def degree_ids(self):
+        """
+        Return an array holding the out-degree of every dense id
+        """
+        return array(NEIGHBOR_TYPECODE, self._degrees)
+
+##############################################################
+
+# Unit Tests
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_gaps(self):
+        data = bytearray()
+        encode_gaps([0, 5, 200, 20000, 2 ** 31], data)
+        self.assertEqual(len(data), 1 + 1 + 2 + 3 + 5)
+        self.assertEqual(list(decode_gaps(data, 0, len(data))), [0, 5, 200, 20000, 2 ** 31])
+
+    def test_round_trip(self):
+        ugraph = {0: set([1, 2]), 1: set([0, 2]), 2: set([0, 1]), 3: set([4]), 4: set([3]),
+                  5: set([])}
+        graph = CompressedGraph.from_dict(ugraph)
+        self.assertEqual(graph.to_dict(), ugraph)
+        self.assertEqual((len(graph), graph.num_arcs()), (6, 8))
+        self.assertEqual(graph[0], [1, 2])
+        self.assertEqual(graph.to_csr().to_dict(), ugraph)
+        self.assertEqual(graph.degree(5), 0)
+        self.assertEqual(graph.bytes_per_arc(), 1.0)
+        words = CompressedGraph.from_dict({"dog": set(["cat"]), "cat": set(["dog"])})
+        self.assertEqual(words["dog"], ["cat"])
+
+    def test_graph_functions(self):
+        import cc_and_graph_resilience as project2
+        import degree_distributions_for_graphs as project1
+        ugraph = {0: set([1, 2]), 1: set([0, 4]), 2: set([0]), 3: set([]), 4: set([1, 5]),
+                  5: set([4]), 6: set([])}
+        graph = CompressedGraph.from_dict(ugraph)
+        self.assertEqual(project2.bfs_visited(graph, 0), set([0, 1, 2, 4, 5]))
+        self.assertEqual(project2.cc_visited(graph), project2.cc_visited(ugraph))
+        self.assertEqual(project2.largest_cc_size(graph), 5)
+        self.assertEqual(project2.compute_resilience(graph, [2, 4]), [5, 4, 2])
+        digraph = {0: set([1, 2]), 1: set([2]), 2: set([]), 7: set([0])}
+        self.assertEqual(project1.compute_in_degrees(CompressedGraph.from_dict(digraph)),
+                         project1.compute_in_degrees(digraph))
+
+    def test_analyses(self):
+        import betweenness
+        import cc_and_graph_resilience as project2
+        import degree_buckets
+        import path_statistics
+        import triangles
+        # Complete graph on 0..3, a pendant node 4 and the edge 5 - 6
+        ugraph = {0: set([1, 2, 3, 4]), 1: set([0, 2, 3]), 2: set([0, 1, 3]),
+                  3: set([0, 1, 2]), 4: set([0]), 5: set([6]), 6: set([5])}
+        graph = CompressedGraph.from_dict(ugraph)
+        self.assertTrue(as_csr(graph) is graph)
+        self.assertEqual(triangles.local_clustering(graph), triangles.local_clustering(ugraph))
+        self.assertEqual(triangles.clustering_summary(graph), triangles.clustering_summary(ugraph))
+        self.assertEqual(triangles.triangle_counts(graph, 2), triangles.triangle_counts(ugraph))
+        edges = list(project2.edge_order(ugraph))
+        self.assertEqual(project2.compute_edge_resilience(graph, edges),
+                         project2.compute_edge_resilience(ugraph, edges))
+        self.assertEqual(betweenness.approximate_betweenness(graph),
+                         betweenness.approximate_betweenness(ugraph))
+        self.assertEqual(degree_buckets.max_degree_order(graph),
+                         degree_buckets.max_degree_order(ugraph))
+        self.assertEqual(path_statistics.source_summary(graph, 4),
+                         path_statistics.source_summary(ugraph, 4))
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
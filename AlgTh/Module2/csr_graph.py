@@ -0,0 +1,489 @@
+"""
+Compact compressed-sparse-row (CSR) representation of graphs.
+
+The projects in Modules 1 and 2 represent a graph as a dictionary
+whose values are Python sets. That is convenient, but every edge
+costs a boxed integer inside a hash table. A CSRGraph stores the
+same graph in two flat typed arrays:
+
+    offsets   - offsets[idx] is the position in neighbors at which
+                the neighbors of the node with dense id idx begin
+    neighbors - the dense ids of the heads of every edge, grouped
+                by tail and sorted within each group
+
+Nodes keep their original keys, interned as dense ids by a
+node_index.NodeIndex. A CSRGraph behaves like a read-only
+dictionary (keys, iteration, membership, indexing) so that it can be
+passed directly to the functions that expect the dictionary form.
+"""
+
+import unittest
+from array import array
+from itertools import izip
+from node_index import NodeIndex
+
+# Typecodes for the offset and neighbor arrays
+OFFSET_TYPECODE = 'l'
+NEIGHBOR_TYPECODE = 'i'
+
+class CSRGraph:
+    """
+    Read-only graph stored as offsets plus neighbor arrays
+    """
+
+    def __init__(self, nodes, offsets, neighbors):
+        """
+        Create a graph from a list of node keys (or a NodeIndex
+        interning them), an array of len(nodes) + 1 offsets and an
+        array of neighbor ids
+        """
+        assert len(offsets) == len(nodes) + 1, "Need one offset per node plus one."
+        self._ids = nodes if isinstance(nodes, NodeIndex) else NodeIndex(nodes)
+        self._nodes = self._ids.nodes()
+        self._offsets = offsets
+        self._neighbors = neighbors
+
+    @classmethod
+    def from_dict(cls, graph):
+        """
+        Build a CSRGraph from a graph represented as a dictionary.
+        Dense ids follow the iteration order of the dictionary.
+        """
+        index = NodeIndex(graph)
+        offsets = array(OFFSET_TYPECODE, [0])
+        heads = []
+        for node in index:
+            heads.extend(graph[node])
+            offsets.append(len(heads))
+        return cls.from_adjacency(index, offsets, heads)
+
+    @classmethod
+    def from_edges(cls, num_nodes, edges, directed=False):
+        """
+        Build a CSRGraph on the nodes 0..num_nodes-1 from an iterable
+        of (tail, head) pairs. Unless directed is True, each pair is
+        stored in both directions. The edges are buffered in two
+        typed arrays and then placed with a counting sort.
+        """
+        tails = array(NEIGHBOR_TYPECODE)
+        heads = array(NEIGHBOR_TYPECODE)
+        for tail, head in edges:
+            tails.append(tail)
+            heads.append(head)
+        if not directed:
+            tails, heads = tails + heads, heads + tails
+
+        offsets = array(OFFSET_TYPECODE, [0]) * (num_nodes + 1)
+        for tail in tails:
+            offsets[tail + 1] += 1
+        for idx in xrange(num_nodes):
+            offsets[idx + 1] += offsets[idx]
+
+        neighbors = array(NEIGHBOR_TYPECODE, [0]) * len(heads)
+        fill = offsets[:-1]
+        for tail, head in izip(tails, heads):
+            neighbors[fill[tail]] = head
+            fill[tail] += 1
+        for idx in xrange(num_nodes):
+            start, end = offsets[idx], offsets[idx + 1]
+            if end - start > 1:
+                neighbors[start:end] = array(NEIGHBOR_TYPECODE, sorted(neighbors[start:end]))
+        return cls(xrange(num_nodes), offsets, neighbors)
+
+    @classmethod
+    def from_adjacency(cls, nodes, offsets, heads):
+        """
+        Build a CSRGraph from the raw rows of an adjacency list:
+        the neighbors of nodes[idx] are the keys heads[offsets[idx]:
+        offsets[idx + 1]]. nodes may be a list of keys or a NodeIndex,
+        and the heads are interned in one batch (see NodeIndex.node_ids).
+        """
+        index = nodes if isinstance(nodes, NodeIndex) else NodeIndex(nodes)
+        neighbors = index.node_ids(heads)
+        for idx in xrange(len(index)):
+            start, end = offsets[idx], offsets[idx + 1]
+            if end - start > 1:
+                neighbors[start:end] = array(NEIGHBOR_TYPECODE, sorted(neighbors[start:end]))
+        return cls(index, offsets, neighbors)
+
+    def to_dict(self):
+        """
+        Return the graph as a dictionary of sets
+        """
+        return dict((node, set(self[node])) for node in self._nodes)
+
+    def __repr__(self):
+        """
+        String representation of the graph
+        """
+        return "CSRGraph(" + str(len(self._nodes)) + " nodes, " + \
+               str(len(self._neighbors)) + " arcs)"
+
+    # Dictionary-like interface
+
+    def __len__(self):
+        """
+        Number of nodes in the graph
+        """
+        return len(self._nodes)
+
+    def __iter__(self):
+        """
+        Iterate over the node keys
+        """
+        return iter(self._nodes)
+
+    def __contains__(self, node):
+        """
+        Check whether node is in the graph
+        """
+        return node in self._ids
+
+    def __getitem__(self, node):
+        """
+        Return a list of the neighbors of node
+        """
+        nodes = self._nodes
+        return [nodes[head] for head in self.neighbor_ids(self._ids.node_id(node))]
+
+    def keys(self):
+        """
+        Return a list of the node keys
+        """
+        return list(self._nodes)
+
+    def values(self):
+        """
+        Return a list of neighbor lists, one per node
+        """
+        return [self[node] for node in self._nodes]
+
+    def items(self):
+        """
+        Return a list of (node, neighbor list) pairs
+        """
+        return [(node, self[node]) for node in self._nodes]
+
+    def degree(self, node):
+        """
+        Return the out-degree of node
+        """
+        idx = self._ids.node_id(node)
+        return self._offsets[idx + 1] - self._offsets[idx]
+
+    # Dense id interface used by array-based algorithms
+
+    def arrays(self):
+        """
+        Return the tuple (nodes, offsets, neighbors) backing the graph
+        """
+        return self._nodes, self._offsets, self._neighbors
+
+    def num_arcs(self):
+        """
+        Number of stored arcs. Each undirected edge is stored twice.
+        """
+        return len(self._neighbors)
+
+    def num_ids(self):
+        """
+        Number of dense ids, deleted or not
+        """
+        return len(self._nodes)
+
+    def removed_mask(self):
+        """
+        Return the mask of deleted dense ids, or None as
+        nothing is ever deleted from a CSRGraph
+        """
+        return None
+
+    def node(self, idx):
+        """
+        Return the key of the node with dense id idx
+        """
+        return self._nodes[idx]
+
+    def node_id(self, node):
+        """
+        Return the dense id of node
+        """
+        return self._ids.node_id(node)
+
+    def node_index(self):
+        """
+        Return the NodeIndex interning the node keys
+        """
+        return self._ids
+
+    def neighbor_ids(self, idx):
+        """
+        Return the dense ids of the neighbors of the node with dense id idx
+        """
+        return self._neighbors[self._offsets[idx]:self._offsets[idx + 1]]
+
+    def degree_ids(self):
+        """
+        Return an array holding the out-degree of every dense id
+        """
+        offsets = self._offsets
+        return array(NEIGHBOR_TYPECODE, [offsets[idx + 1] - offsets[idx]
+                                         for idx in xrange(len(self._nodes))])
+
+class DeletionOverlay:
+    """
+    View of an undirected CSRGraph with some of its nodes deleted
+
+    The base graph is never modified. Deletions are recorded in a
+    mask with one byte per node, so any number of attack simulations
+    can share one base graph. The overlay offers the same dictionary
+    and dense id interfaces as CSRGraph, restricted to the nodes that
+    have not been deleted.
+    """
+
+    def __init__(self, graph):
+        """
+        Create an overlay of graph with no nodes deleted
+        """
+        self._graph = as_csr(graph)
+        self._removed = bytearray(self._graph.num_ids())
+        self._num_live = len(self._removed)
+
+    def delete_node(self, node):
+        """
+        Delete node from the view. Deleting it again has no effect.
+        """
+        self.delete_ids([self._graph.node_id(node)])
+
+    def delete_ids(self, ids):
+        """
+        Delete the nodes with the dense ids in ids from the view
+        """
+        removed = self._removed
+        for idx in ids:
+            if not removed[idx]:
+                removed[idx] = 1
+                self._num_live -= 1
+
+    def is_deleted(self, node):
+        """
+        Check whether node has been deleted from the view
+        """
+        return bool(self._removed[self._graph.node_id(node)])
+
+    def base_graph(self):
+        """
+        Return the underlying CSRGraph
+        """
+        return self._graph
+
+    def to_dict(self):
+        """
+        Return the remaining graph as a dictionary of sets
+        """
+        return dict((node, set(self[node])) for node in self)
+
+    def __repr__(self):
+        """
+        String representation of the overlay
+        """
+        return "DeletionOverlay(" + str(self._num_live) + " of " + \
+               str(len(self._removed)) + " nodes)"
+
+    # Dictionary-like interface over the remaining nodes
+
+    def __len__(self):
+        """
+        Number of nodes that have not been deleted
+        """
+        return self._num_live
+
+    def __iter__(self):
+        """
+        Iterate over the keys of the remaining nodes
+        """
+        graph = self._graph
+        removed = self._removed
+        return (graph.node(idx) for idx in xrange(len(removed)) if not removed[idx])
+
+    def __contains__(self, node):
+        """
+        Check whether node is in the graph and not deleted
+        """
+        return node in self._graph and not self.is_deleted(node)
+
+    def __getitem__(self, node):
+        """
+        Return a list of the remaining neighbors of node
+        """
+        if self.is_deleted(node):
+            raise KeyError(node)
+        graph = self._graph
+        return [graph.node(head) for head in self.neighbor_ids(graph.node_id(node))]
+
+    def keys(self):
+        """
+        Return a list of the keys of the remaining nodes
+        """
+        return list(self)
+
+    def values(self):
+        """
+        Return a list of remaining neighbor lists, one per node
+        """
+        return [self[node] for node in self]
+
+    def items(self):
+        """
+        Return a list of (node, neighbor list) pairs
+        """
+        return [(node, self[node]) for node in self]
+
+    def degree(self, node):
+        """
+        Return the number of remaining neighbors of node
+        """
+        return len(self[node])
+
+    # Dense id interface
+
+    def num_ids(self):
+        """
+        Number of dense ids, deleted or not
+        """
+        return len(self._removed)
+
+    def removed_mask(self):
+        """
+        Return the mask of deleted dense ids
+        """
+        return self._removed
+
+    def node(self, idx):
+        """
+        Return the key of the node with dense id idx
+        """
+        return self._graph.node(idx)
+
+    def node_id(self, node):
+        """
+        Return the dense id of node
+        """
+        return self._graph.node_id(node)
+
+    def node_index(self):
+        """
+        Return the NodeIndex interning the node keys
+        """
+        return self._graph.node_index()
+
+    def neighbor_ids(self, idx):
+        """
+        Return the dense ids of the remaining neighbors of
+        the node with dense id idx
+        """
+        removed = self._removed
+        return [head for head in self._graph.neighbor_ids(idx) if not removed[head]]
+
+    def degree_ids(self):
+        """
+        Return an array holding the number of remaining neighbors
+        of every dense id, with zero for deleted ids
+        """
+        removed = self._removed
+        return array(NEIGHBOR_TYPECODE, [0 if removed[idx] else len(self.neighbor_ids(idx))
+                                         for idx in xrange(len(removed))])
+
+def as_csr(graph):
+    """
+    Return graph as a CSRGraph, converting it from the
+    dictionary form if necessary. A DeletionOverlay or a
+    compressed_graph.CompressedGraph, which offer the same dense id
+    interface, is returned unchanged.
+    """
+    # Imported here as compressed_graph itself imports this module
+    from compressed_graph import CompressedGraph
+    if isinstance(graph, (CSRGraph, DeletionOverlay, CompressedGraph)):
+        return graph
+    return CSRGraph.from_dict(graph)
+
+##############################################################
+
+# Unit Tests
+
+CSR_GRAPH0 = {0: set([1, 2]),
+              1: set([0, 2]),
+              2: set([0, 1]),
+              3: set([4]),
+              4: set([3]),
+              5: set([])}
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_round_trip(self):
+        graph = CSRGraph.from_dict(CSR_GRAPH0)
+        self.assertEqual(len(graph), 6)
+        self.assertEqual(graph.num_arcs(), 8)
+        self.assertEqual(graph.to_dict(), CSR_GRAPH0)
+        self.assertEqual(sorted(graph.keys()), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(graph.degree(0), 2)
+        self.assertEqual(graph.degree(5), 0)
+        self.assertTrue(3 in graph)
+        self.assertFalse(6 in graph)
+
+    def test_string_keys(self):
+        ugraph = {"dog": set(["cat"]), "cat": set(["dog"]), "ape": set([])}
+        graph = CSRGraph.from_dict(ugraph)
+        self.assertEqual(graph["dog"], ["cat"])
+        self.assertEqual(graph.to_dict(), ugraph)
+        self.assertEqual(graph.node(graph.node_id("ape")), "ape")
+
+    def test_from_edges(self):
+        edges = [(0, 1), (0, 2), (1, 2), (3, 4)]
+        self.assertEqual(CSRGraph.from_edges(6, edges).to_dict(), CSR_GRAPH0)
+        digraph = CSRGraph.from_edges(3, [(0, 2), (0, 1), (1, 2)], directed=True)
+        self.assertEqual(digraph.to_dict(), {0: set([1, 2]), 1: set([2]), 2: set([])})
+        self.assertEqual(list(digraph.neighbor_ids(0)), [1, 2])
+
+    def test_as_csr(self):
+        graph = as_csr(CSR_GRAPH0)
+        self.assertTrue(as_csr(graph) is graph)
+
+    def test_deletion_overlay(self):
+        base = CSRGraph.from_dict(CSR_GRAPH0)
+        view = DeletionOverlay(base)
+        view.delete_node(1)
+        view.delete_node(1)
+        view.delete_node(4)
+        self.assertEqual(len(view), 4)
+        self.assertEqual(sorted(view), [0, 2, 3, 5])
+        self.assertEqual(view.to_dict(), {0: set([2]), 2: set([0]), 3: set([]), 5: set([])})
+        self.assertEqual(view.degree(0), 1)
+        self.assertEqual(list(view.degree_ids()), [1, 0, 1, 0, 0, 0])
+        self.assertFalse(1 in view)
+        self.assertRaises(KeyError, view.__getitem__, 1)
+        self.assertEqual(base.to_dict(), CSR_GRAPH0)
+        self.assertEqual(len(DeletionOverlay(base)), 6)
+
+    def test_degree_functions(self):
+        import degree_distributions_for_graphs as project1
+        digraph = {0: set([1, 2]), 1: set([2]), 2: set([])}
+        graph = CSRGraph.from_dict(digraph)
+        self.assertEqual(project1.compute_in_degrees(graph), {0: 0, 1: 1, 2: 2})
+        self.assertEqual(project1.in_degree_distribution(graph), {0: 1, 1: 1, 2: 1})
+
+    def test_resilience_functions(self):
+        import cc_and_graph_resilience as project2
+        graph = CSRGraph.from_dict(CSR_GRAPH0)
+        self.assertEqual(project2.bfs_visited(graph, 3), set([3, 4]))
+        self.assertEqual(sorted(project2.cc_visited(graph)),
+                         sorted([set([0, 1, 2]), set([3, 4]), set([5])]))
+        self.assertEqual(project2.largest_cc_size(graph), 3)
+        self.assertEqual(project2.compute_resilience(graph, [0, 3]), [3, 2, 2])
+        self.assertEqual(graph.to_dict(), CSR_GRAPH0)
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
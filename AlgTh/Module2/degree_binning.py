@@ -0,0 +1,103 @@
+"""
+Logarithmically binned degree distributions for large graphs.
+
+in_degree_distribution returns one (degree, count) point for every
+distinct degree, and plotting all of them on a log/log scale becomes
+slow and noisy once graphs have millions of nodes. The functions
+below work on a NumPy array of degrees instead:
+
+    in_degree_array         - in-degrees from the CSR arrays with one
+                              bincount over the neighbor ids
+    log_binned_distribution - fraction of nodes per unit of degree in
+                              bins of geometrically growing width
+    ccdf                    - fraction of nodes with degree at least k
+
+Each costs a few vectorized passes over the degrees, and the binned
+series has only a few points per decade however large the graph is.
+"""
+
+import unittest
+import numpy
+from csr_graph import CSRGraph
+from graph_cache import as_numpy_array
+
+def in_degree_array(digraph):
+    """
+    Takes the directed graph digraph and returns a NumPy array whose
+    ith entry is the in-degree of the node with dense id i
+    """
+    graph = digraph if isinstance(digraph, CSRGraph) else CSRGraph.from_dict(digraph)
+    heads = as_numpy_array(graph.arrays()[2], numpy.int32)
+    return numpy.bincount(heads, minlength=len(graph))
+
+def log_binned_distribution(degrees, bins_per_decade=10):
+    """
+    Takes an array of degrees and returns a tuple (centers, densities)
+    of NumPy arrays. Positive degrees are grouped into bins whose edges
+    grow by a factor of 10 ** (1 / bins_per_decade); densities[i] is
+    the fraction of all nodes in bin i divided by the number of
+    integer degrees the bin covers, and centers[i] is the geometric
+    center of the bin. Empty bins are left out.
+    """
+    degrees = numpy.asarray(degrees)
+    positive = degrees[degrees > 0]
+    if len(positive) == 0:
+        return numpy.zeros(0), numpy.zeros(0)
+    num_bins = int(numpy.ceil(numpy.log10(positive.max() + 1) * bins_per_decade))
+    edges = numpy.unique(numpy.ceil(numpy.logspace(0, num_bins / float(bins_per_decade),
+                                                   num_bins + 1)))
+    edges[-1] = max(edges[-1], positive.max() + 1)
+    counts = numpy.histogram(positive, bins=edges)[0]
+    # Bin i holds the integer degrees edges[i] .. edges[i + 1] - 1
+    widths = numpy.diff(edges)
+    densities = counts / (widths * float(len(degrees)))
+    centers = numpy.sqrt(edges[:-1] * (edges[1:] - 1))
+    nonempty = counts > 0
+    return centers[nonempty], densities[nonempty]
+
+def ccdf(degrees):
+    """
+    Takes an array of degrees and returns a tuple (values, fractions)
+    of NumPy arrays where values holds the distinct degrees in
+    increasing order and fractions[i] is the fraction of nodes whose
+    degree is at least values[i]
+    """
+    degrees = numpy.asarray(degrees)
+    if len(degrees) == 0:
+        return numpy.zeros(0, dtype=int), numpy.zeros(0)
+    values, counts = numpy.unique(degrees, return_counts=True)
+    at_least = numpy.cumsum(counts[::-1])[::-1]
+    return values, at_least / float(len(degrees))
+
+##############################################################
+
+# Unit Tests
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_in_degree_array(self):
+        digraph = {0: set([1, 2]), 1: set([2]), 2: set([]), 3: set([2])}
+        self.assertEqual(list(in_degree_array(digraph)), [0, 1, 3, 0])
+        self.assertEqual(list(in_degree_array(CSRGraph.from_dict(digraph))), [0, 1, 3, 0])
+
+    def test_log_binned_distribution(self):
+        degrees = numpy.array([0, 1, 1, 2, 3, 5, 8, 13, 100])
+        centers, densities = log_binned_distribution(degrees, 1)
+        # Bins [1, 10), [10, 100) and [100, 1000)
+        self.assertTrue(numpy.allclose(centers, [3.0, numpy.sqrt(990), numpy.sqrt(99900)]))
+        self.assertTrue(numpy.allclose(densities, [6 / 81.0, 1 / 810.0, 1 / 8100.0]))
+        centers, densities = log_binned_distribution(degrees)
+        self.assertTrue(numpy.all(numpy.diff(centers) > 0))
+        self.assertEqual(len(log_binned_distribution([0, 0])[0]), 0)
+
+    def test_ccdf(self):
+        values, fractions = ccdf([3, 1, 1, 0])
+        self.assertEqual(list(values), [0, 1, 3])
+        self.assertTrue(numpy.allclose(fractions, [1.0, 0.75, 0.25]))
+        self.assertEqual(len(ccdf([])[0]), 0)
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
@@ -0,0 +1,219 @@
+"""
+Bucket-queue peeling of undirected graphs.
+
+Nodes are kept in a flat array sorted by current degree, together
+with the position of every node in that array and the start of every
+degree bucket. When a node is removed, each remaining neighbor drops
+one bucket by swapping it with the boundary element of its bucket,
+so every removal costs O(degree) and the graph itself is never copied
+or modified. This is the layout used by Batagelj and Zaversnik for
+computing k-cores.
+
+Two peeling orders are provided:
+
+    max_degree_order - repeatedly removes a node of maximum degree,
+                       the targeted attack order of Application 2
+    core_numbers     - repeatedly removes a node of minimum degree,
+                       which yields the k-core number of every node
+"""
+
+import unittest
+from array import array
+from csr_graph import DeletionOverlay, as_csr
+
+def _bucket_sort(degrees, node_order):
+    """
+    Takes an array of degrees indexed by dense id and a sequence of
+    dense ids, and returns a tuple (bins, vert, pos) where vert lists
+    the ids by increasing degree (ties kept in node_order), pos[idx]
+    is the position of idx in vert, and bins[deg] is the position in
+    vert at which the nodes of degree deg begin.
+    """
+    num_nodes = len(degrees)
+    max_deg = max(degrees) if num_nodes > 0 else 0
+    bins = array('l', [0]) * (max_deg + 2)
+    for deg in degrees:
+        bins[deg] += 1
+    start = 0
+    for deg in xrange(max_deg + 1):
+        count = bins[deg]
+        bins[deg] = start
+        start += count
+    bins[max_deg + 1] = start
+
+    vert = array('i', [0]) * num_nodes
+    pos = array('i', [0]) * num_nodes
+    for idx in node_order:
+        deg = degrees[idx]
+        pos[idx] = bins[deg]
+        vert[bins[deg]] = idx
+        bins[deg] += 1
+
+    # Placing the nodes moved each bucket start to the next bucket
+    for deg in xrange(max_deg, 0, -1):
+        bins[deg] = bins[deg - 1]
+    bins[0] = 0
+    return bins, vert, pos
+
+def live_ids(graph):
+    """
+    Return a list of the dense ids of graph that have not been deleted
+    """
+    removed = graph.removed_mask()
+    if not removed:
+        return range(graph.num_ids())
+    return [idx for idx in xrange(graph.num_ids()) if not removed[idx]]
+
+def _move_down(bins, vert, pos, degrees, idx):
+    """
+    Moves the node with dense id idx from its degree bucket to the
+    bucket below by swapping it with the first node of its bucket.
+    """
+    deg = degrees[idx]
+    first_pos = bins[deg]
+    first_idx = vert[first_pos]
+    if first_idx != idx:
+        idx_pos = pos[idx]
+        vert[first_pos], vert[idx_pos] = idx, first_idx
+        pos[idx], pos[first_idx] = first_pos, idx_pos
+    bins[deg] += 1
+    degrees[idx] -= 1
+
+def iter_max_degree_ids(graph):
+    """
+    Takes a CSRGraph and lazily yields its dense ids in the order in
+    which repeatedly deleting a node of maximum degree removes them.
+    Once only isolated nodes remain they follow in graph order, as
+    in provided_code.targeted_order.
+    """
+    num_nodes = graph.num_ids()
+    degrees = graph.degree_ids()
+    bins, vert, pos = _bucket_sort(degrees, xrange(num_nodes - 1, -1, -1))
+    removed = bytearray(graph.removed_mask() or num_nodes)
+
+    # The last position of vert always holds a node of maximum degree
+    end = num_nodes
+    while end > 0 and degrees[vert[end - 1]] > 0:
+        end -= 1
+        max_idx = vert[end]
+        removed[max_idx] = 1
+        yield max_idx
+        for neighbor in graph.neighbor_ids(max_idx):
+            if not removed[neighbor]:
+                _move_down(bins, vert, pos, degrees, neighbor)
+
+    for idx in xrange(num_nodes):
+        if not removed[idx]:
+            yield idx
+
+def max_degree_ids(graph):
+    """
+    Takes a CSRGraph and returns a list of dense ids in the order in
+    which repeatedly deleting a node of maximum degree removes them
+    (see iter_max_degree_ids).
+    """
+    return list(iter_max_degree_ids(graph))
+
+def max_degree_order(ugraph):
+    """
+    Takes the undirected graph ugraph and returns a list of its
+    nodes in the targeted attack order, where each node has maximum
+    degree in the graph that remains after deleting the nodes before it.
+    """
+    graph = as_csr(ugraph)
+    return [graph.node(idx) for idx in max_degree_ids(graph)]
+
+def core_number_ids(graph):
+    """
+    Takes a CSRGraph and returns an array whose ith entry is the
+    core number of the node with dense id i, i.e. the largest k such
+    that the node belongs to a subgraph in which every node has
+    degree at least k. Deleted ids of a DeletionOverlay get zero.
+    """
+    num_nodes = graph.num_ids()
+    removed = graph.removed_mask()
+    degrees = graph.degree_ids()
+    bins, vert, pos = _bucket_sort(degrees, xrange(num_nodes))
+
+    # Process nodes in order of increasing current degree. Neighbors
+    # never drop below the degree of the node being removed.
+    for position in xrange(num_nodes):
+        min_idx = vert[position]
+        if removed and removed[min_idx]:
+            continue
+        min_deg = degrees[min_idx]
+        for neighbor in graph.neighbor_ids(min_idx):
+            if degrees[neighbor] > min_deg:
+                _move_down(bins, vert, pos, degrees, neighbor)
+    return degrees
+
+def core_numbers(ugraph):
+    """
+    Takes the undirected graph ugraph and returns a dictionary
+    mapping each node to its core number.
+    """
+    graph = as_csr(ugraph)
+    cores = core_number_ids(graph)
+    return dict((graph.node(idx), cores[idx]) for idx in live_ids(graph))
+
+def core_targeted_order(ugraph):
+    """
+    Takes the undirected graph ugraph and returns a list of its
+    nodes ordered by decreasing core number, with ties broken by
+    decreasing degree. Attacking nodes in this order targets the
+    densest part of the graph first.
+    """
+    graph = as_csr(ugraph)
+    cores = core_number_ids(graph)
+    degrees = graph.degree_ids()
+    order = sorted(live_ids(graph), key=lambda idx: (-cores[idx], -degrees[idx]))
+    return [graph.node(idx) for idx in order]
+
+##############################################################
+
+# Unit Tests
+
+# Triangle 0, 1, 2 with a tail 2 - 3 - 4 and an isolated node 5
+BUCKET_GRAPH0 = {0: set([1, 2]),
+                 1: set([0, 2]),
+                 2: set([0, 1, 3]),
+                 3: set([2, 4]),
+                 4: set([3]),
+                 5: set([])}
+
+# Complete graph on 0..3 with a pendant node 4 attached to 0
+BUCKET_GRAPH1 = {0: set([1, 2, 3, 4]),
+                 1: set([0, 2, 3]),
+                 2: set([0, 1, 3]),
+                 3: set([0, 1, 2]),
+                 4: set([0])}
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_max_degree_order(self):
+        self.assertEqual(max_degree_order(BUCKET_GRAPH0), [2, 3, 1, 0, 4, 5])
+        self.assertEqual(max_degree_order(BUCKET_GRAPH1), [0, 3, 2, 1, 4])
+        self.assertEqual(max_degree_order({}), [])
+        self.assertEqual(BUCKET_GRAPH0[2], set([0, 1, 3]))
+
+    def test_core_numbers(self):
+        self.assertEqual(core_numbers(BUCKET_GRAPH0), {0: 2, 1: 2, 2: 2, 3: 1, 4: 1, 5: 0})
+        self.assertEqual(core_numbers(BUCKET_GRAPH1), {0: 3, 1: 3, 2: 3, 3: 3, 4: 1})
+        self.assertEqual(core_numbers({}), {})
+
+    def test_deletion_overlay(self):
+        view = DeletionOverlay(BUCKET_GRAPH1)
+        view.delete_node(3)
+        self.assertEqual(max_degree_order(view), [0, 2, 1, 4])
+        self.assertEqual(core_numbers(view), {0: 2, 1: 2, 2: 2, 4: 1})
+        self.assertEqual(core_targeted_order(view), [0, 1, 2, 4])
+
+    def test_core_targeted_order(self):
+        self.assertEqual(core_targeted_order(BUCKET_GRAPH0), [2, 0, 1, 3, 4, 5])
+        self.assertEqual(core_targeted_order(BUCKET_GRAPH1), [0, 1, 2, 3, 4])
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
@@ -0,0 +1,176 @@
+"""
+One-pass degree statistics read straight from graph files.
+
+The statistics of a graph file (node and edge counts, in-degree and
+out-degree histograms, maximum degrees and self-loops) are gathered
+while the file is streamed line by line, without building the graph.
+Out-degrees are finished as soon as their line is read; in-degrees
+are tallied per cited node, so memory grows with the number of nodes
+but never with the number of edges or the size of the file.
+
+A plain local file can be split at line boundaries into byte ranges
+that are read by separate processes and whose partial statistics are
+then merged. URLs and gzip files are read in a single pass.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import unittest
+from collections import Counter
+import graph_io
+
+def line_ranges(path, num_ranges):
+    """
+    Split the file at path into at most num_ranges consecutive
+    (start, stop) byte ranges, each beginning at the start of a line
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as graph_file:
+        for part in range(1, num_ranges):
+            position = size * part // num_ranges
+            if position <= bounds[-1]:
+                continue
+            # Move to the start of the line after position - 1
+            graph_file.seek(position - 1)
+            graph_file.readline()
+            position = graph_file.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+    bounds.append(size)
+    return [(bounds[idx], bounds[idx + 1]) for idx in range(len(bounds) - 1)]
+
+def _read_lines(graph_file, stop=None):
+    """
+    Return the partial statistics of the lines of graph_file,
+    reading up to byte stop if given
+    """
+    num_nodes = 0
+    num_edges = 0
+    self_loops = 0
+    out_histogram = Counter()
+    in_degrees = Counter()
+    while stop is None or graph_file.tell() < stop:
+        line = graph_file.readline()
+        if not line:
+            break
+        values = line.split()
+        if not values:
+            continue
+        node = int(values[0])
+        heads = set(int(value) for value in values[1:])
+        num_nodes += 1
+        num_edges += len(heads)
+        out_histogram[len(heads)] += 1
+        if node in heads:
+            self_loops += 1
+        in_degrees.update(heads)
+    return [num_nodes, num_edges, self_loops, out_histogram, in_degrees]
+
+def _range_stats(task):
+    """
+    Return the partial statistics of the byte range (path, start, stop)
+    """
+    path, start, stop = task
+    with open(path, 'rb') as graph_file:
+        graph_file.seek(start)
+        return _read_lines(graph_file, stop)
+
+def _merge(partials):
+    """
+    Combine partial statistics into the dictionary returned by
+    degree_stats
+    """
+    num_nodes = num_edges = self_loops = 0
+    out_histogram = Counter()
+    in_degrees = Counter()
+    for part_nodes, part_edges, part_loops, part_out, part_in in partials:
+        num_nodes += part_nodes
+        num_edges += part_edges
+        self_loops += part_loops
+        out_histogram.update(part_out)
+        in_degrees.update(part_in)
+    in_histogram = Counter(in_degrees.itervalues())
+    # Every node of the file that is never cited has in-degree 0
+    uncited = num_nodes - len(in_degrees)
+    if uncited > 0:
+        in_histogram[0] = uncited
+    return {"nodes": num_nodes,
+            "edges": num_edges,
+            "self_loops": self_loops,
+            "in_degree_histogram": dict(in_histogram),
+            "out_degree_histogram": dict(out_histogram),
+            "max_in_degree": max(in_histogram) if in_histogram else 0,
+            "max_out_degree": max(out_histogram) if out_histogram else 0}
+
+def degree_stats(source, num_workers=1):
+    """
+    Takes the graph file source (a URL, a gzip-compressed path ending
+    in ".gz" or a plain path) and returns a dictionary holding its
+    number of nodes, edges and self-loops, its in-degree and out-degree
+    histograms (dictionaries mapping each degree to its number of
+    nodes) and its maximum in-degree and out-degree. Every node is
+    assumed to have its own line. A plain path is split across
+    num_workers processes (all CPUs if None); other sources are read
+    in a single pass.
+    """
+    plain_file = os.path.isfile(source) and not source.endswith(".gz")
+    if num_workers == 1 or not plain_file:
+        graph_file = graph_io.open_graph_file(source)
+        try:
+            return _merge([_read_lines(graph_file)])
+        finally:
+            graph_file.close()
+
+    num_workers = num_workers or multiprocessing.cpu_count()
+    tasks = [(source, start, stop) for start, stop in line_ranges(source, num_workers)]
+    pool = multiprocessing.Pool(num_workers)
+    try:
+        partials = pool.map(_range_stats, tasks)
+    finally:
+        pool.close()
+        pool.join()
+    return _merge(partials)
+
+##############################################################
+
+# Unit Tests
+
+GRAPH_TEXT = "0 1 2\n1 2\n2\n3 0 1 2 3\n4 1\n"
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".txt")
+        os.close(handle)
+        with open(self.path, 'w') as graph_file:
+            graph_file.write(GRAPH_TEXT)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_degree_stats(self):
+        stats = degree_stats(self.path)
+        self.assertEqual((stats["nodes"], stats["edges"], stats["self_loops"]), (5, 8, 1))
+        self.assertEqual(stats["out_degree_histogram"], {0: 1, 1: 2, 2: 1, 4: 1})
+        self.assertEqual(stats["in_degree_histogram"], {0: 1, 1: 2, 3: 2})
+        self.assertEqual((stats["max_in_degree"], stats["max_out_degree"]), (3, 4))
+
+    def test_line_ranges(self):
+        for num_ranges in range(1, 8):
+            ranges = line_ranges(self.path, num_ranges)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], len(GRAPH_TEXT))
+            for start, stop in ranges:
+                self.assertTrue(start < stop)
+                self.assertTrue(start == 0 or GRAPH_TEXT[start - 1] == "\n")
+
+    def test_parallel(self):
+        self.assertEqual(degree_stats(self.path, 3), degree_stats(self.path))
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
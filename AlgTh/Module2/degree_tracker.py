@@ -0,0 +1,189 @@
+"""
+Incrementally maintained in-degree distribution of a growing digraph.
+
+in_degree_distribution recomputes every in-degree from scratch. An
+InDegreeTracker instead keeps the in-degree of every node in an array
+(indexed by the order in which nodes were first seen) together with
+the histogram of those in-degrees. Inserting or deleting an edge moves
+one node from one histogram bucket to the next, so a batch of edges
+costs O(batch) and the distribution can be read at any time without
+touching the rest of the graph.
+
+The tracker does not store the edges themselves, so it trusts its
+caller to insert each edge once and to delete only edges that are
+present, as a citation feed does. Each batch is checked before any
+of it is applied, so a batch that raises leaves the tracker unchanged.
+"""
+
+import unittest
+from array import array
+from collections import Counter
+import degree_distributions_for_graphs as project
+
+class InDegreeTracker:
+    """
+    In-degrees and their distribution for a digraph that changes
+    by batches of edge insertions and deletions
+    """
+
+    def __init__(self, digraph=None):
+        """
+        Start from the digraph given as a dictionary (empty by default)
+        """
+        self._index = {}
+        self._nodes = []
+        self._in_degrees = array('l')
+        self._histogram = {}
+        self._num_edges = 0
+        if digraph is not None:
+            self.add_nodes(digraph)
+            self.insert_edges((tail, head) for tail in digraph for head in digraph[tail])
+
+    def __len__(self):
+        """
+        Return the number of nodes seen so far
+        """
+        return len(self._nodes)
+
+    def __contains__(self, node):
+        """
+        Return True if node has been seen
+        """
+        return node in self._index
+
+    def num_edges(self):
+        """
+        Return the number of edges currently in the digraph
+        """
+        return self._num_edges
+
+    def _node_id(self, node):
+        """
+        Return the dense id of node, adding it with in-degree 0 if new
+        """
+        idx = self._index.get(node)
+        if idx is None:
+            idx = len(self._nodes)
+            self._index[node] = idx
+            self._nodes.append(node)
+            self._in_degrees.append(0)
+            self._histogram[0] = self._histogram.get(0, 0) + 1
+        return idx
+
+    def _move(self, idx, step):
+        """
+        Change the in-degree of the node with dense id idx by step
+        and move it to its new histogram bucket
+        """
+        old_degree = self._in_degrees[idx]
+        new_degree = old_degree + step
+        if new_degree < 0:
+            raise ValueError("in-degree of " + repr(self._nodes[idx]) + " would be negative")
+        self._in_degrees[idx] = new_degree
+        if self._histogram[old_degree] == 1:
+            del self._histogram[old_degree]
+        else:
+            self._histogram[old_degree] -= 1
+        self._histogram[new_degree] = self._histogram.get(new_degree, 0) + 1
+
+    def add_nodes(self, nodes):
+        """
+        Add every node of nodes not seen yet, with in-degree 0
+        """
+        for node in nodes:
+            self._node_id(node)
+
+    def insert_edges(self, edges):
+        """
+        Insert a batch of (tail, head) edges, adding unseen nodes.
+        Self-loops raise a ValueError.
+        """
+        edges = list(edges)
+        for tail, head in edges:
+            if tail == head:
+                raise ValueError("self-loop at " + repr(tail))
+        for tail, head in edges:
+            self._node_id(tail)
+            self._move(self._node_id(head), 1)
+            self._num_edges += 1
+
+    def delete_edges(self, edges):
+        """
+        Delete a batch of (tail, head) edges. Nodes are kept even
+        when they lose all of their edges.
+        """
+        edges = list(edges)
+        for tail, head in edges:
+            if tail not in self._index or head not in self._index:
+                raise KeyError((tail, head))
+        for head, count in Counter(head for dummy_tail, head in edges).iteritems():
+            if self.in_degree(head) < count:
+                raise ValueError("in-degree of " + repr(head) + " would be negative")
+        for dummy_tail, head in edges:
+            self._move(self._index[head], -1)
+            self._num_edges -= 1
+
+    def in_degree(self, node):
+        """
+        Return the in-degree of node
+        """
+        return self._in_degrees[self._index[node]]
+
+    def in_degrees(self):
+        """
+        Return a dictionary mapping each node to its in-degree,
+        as compute_in_degrees does
+        """
+        return dict((node, self._in_degrees[idx]) for idx, node in enumerate(self._nodes))
+
+    def distribution(self):
+        """
+        Return a snapshot of the in-degree distribution as a dictionary
+        mapping each in-degree to its number of nodes, as
+        in_degree_distribution does
+        """
+        return dict(self._histogram)
+
+##############################################################
+
+# Unit Tests
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_initial_graph(self):
+        tracker = InDegreeTracker(project.EX_GRAPH2)
+        self.assertEqual(tracker.distribution(), project.in_degree_distribution(project.EX_GRAPH2))
+        self.assertEqual(tracker.in_degrees(), project.compute_in_degrees(project.EX_GRAPH2))
+        self.assertEqual(InDegreeTracker().distribution(), {})
+
+    def test_batches(self):
+        tracker = InDegreeTracker({0: set([1]), 1: set([])})
+        tracker.insert_edges([(2, 1), (3, 1), (3, 2)])
+        self.assertEqual((len(tracker), tracker.num_edges()), (4, 4))
+        self.assertEqual(tracker.in_degree(1), 3)
+        self.assertEqual(tracker.distribution(), {0: 2, 1: 1, 3: 1})
+        tracker.delete_edges([(0, 1), (3, 2)])
+        self.assertEqual(tracker.distribution(), {0: 3, 2: 1})
+        self.assertEqual(tracker.num_edges(), 2)
+        tracker.add_nodes([4, 0])
+        self.assertEqual(tracker.distribution(), {0: 4, 2: 1})
+
+    def test_invalid_edges(self):
+        tracker = InDegreeTracker({0: set([1]), 1: set([])})
+        self.assertRaises(ValueError, tracker.insert_edges, [(2, 2)])
+        self.assertRaises(ValueError, tracker.delete_edges, [(1, 0)])
+        self.assertRaises(KeyError, tracker.delete_edges, [(5, 0)])
+
+    def test_atomic_batches(self):
+        tracker = InDegreeTracker({0: set([1]), 1: set([])})
+        self.assertRaises(ValueError, tracker.insert_edges, [(0, 2), (2, 2)])
+        self.assertRaises(ValueError, tracker.delete_edges, [(0, 1), (0, 1)])
+        self.assertRaises(KeyError, tracker.delete_edges, iter([(0, 1), (5, 1)]))
+        self.assertEqual((len(tracker), tracker.num_edges()), (2, 1))
+        self.assertEqual(tracker.distribution(), {0: 1, 1: 1})
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
@@ -0,0 +1,200 @@
+"""
+Random graph generators whose running time is proportional to the
+number of edges they produce.
+
+Each generator yields its edges one at a time, so a graph can be
+streamed to an edge-list file with write_edge_list, collected into
+a CSRGraph with CSRGraph.from_edges, or collected into the usual
+dictionary of sets with edges_to_dict. Every generator takes an
+optional seed and draws from its own random.Random instance.
+"""
+
+import math
+import random
+import unittest
+from array import array
+import numpy
+from csr_graph import CSRGraph
+
+# ER graphs
+
+def er_edges(num_nodes, probability, seed=None):
+    """
+    Yields the edges (nodei, nodej) with nodei < nodej of an
+    undirected ER graph on num_nodes nodes, where each pair of nodes
+    is joined with the given probability.
+
+    Rather than drawing one random number per pair, the generator
+    draws the geometrically distributed gap to the next accepted pair
+    (Batagelj and Brandes), so it runs in O(n + m) time.
+    """
+    if probability <= 0:
+        return
+    rng = random.Random(seed)
+    if probability >= 1:
+        for nodej in xrange(1, num_nodes):
+            for nodei in xrange(nodej):
+                yield nodei, nodej
+        return
+
+    log_q = math.log(1.0 - probability)
+    nodej = 1
+    nodei = -1
+    while nodej < num_nodes:
+        nodei += 1 + int(math.log(1.0 - rng.random()) / log_q)
+        while nodei >= nodej and nodej < num_nodes:
+            nodei -= nodej
+            nodej += 1
+        if nodej < num_nodes:
+            yield nodei, nodej
+
+# Preferential attachment graphs
+
+class PATrial:
+    """
+    Array-backed trials for the DPA and UPA algorithms
+
+    Like the provided DPATrial and UPATrial classes, keeps a list of
+    node numbers in which each number appears in proportion to the
+    probability of choosing that node. The list is a typed array, and
+    the num_nodes draws of a trial are taken in one batched NumPy call.
+    """
+
+    def __init__(self, num_nodes, undirected=False, seed=None):
+        """
+        Initialize a PATrial object corresponding to a complete
+        graph with num_nodes nodes. For the UPA algorithm pass
+        undirected=True so that new nodes are weighted by their
+        total degree.
+        """
+        self._num_nodes = num_nodes
+        self._undirected = undirected
+        # NumPy seeds must fit in 32 bits, so any seed is mapped through random.Random
+        self._random = numpy.random.RandomState(random.Random(seed).getrandbits(32))
+        self._node_numbers = array('i', xrange(num_nodes)) * num_nodes
+
+    def run_trial(self, num_nodes):
+        """
+        Conduct num_nodes trials and return the set of chosen
+        nodes, then add the new node and its neighbors to the
+        list of node numbers
+        """
+        node_numbers = self._node_numbers
+        positions = self._random.randint(0, len(node_numbers), num_nodes)
+        chosen = numpy.frombuffer(node_numbers, dtype=numpy.int32)[positions]
+        new_node_neighbors = set(chosen.tolist())
+
+        node_numbers.append(self._num_nodes)
+        if self._undirected:
+            node_numbers.extend(array('i', [self._num_nodes]) * len(new_node_neighbors))
+        node_numbers.extend(new_node_neighbors)
+
+        self._num_nodes += 1
+        return new_node_neighbors
+
+def _pa_edges(num_final_nodes, num_existing_nodes, undirected, seed):
+    """
+    Yields the edges of a DPA or UPA graph. Edges of the initial
+    complete graph come first, then the edges from each new node.
+    """
+    for nodei in xrange(num_existing_nodes):
+        for nodej in xrange(num_existing_nodes):
+            if nodei < nodej or (nodei != nodej and not undirected):
+                yield nodei, nodej
+    trial = PATrial(num_existing_nodes, undirected, seed)
+    for node in xrange(num_existing_nodes, num_final_nodes):
+        for neighbor in trial.run_trial(num_existing_nodes):
+            yield node, neighbor
+
+def dpa_edges(num_final_nodes, num_existing_nodes, seed=None):
+    """
+    Yields the directed edges of a DPA graph with num_final_nodes
+    nodes in which each new node cites num_existing_nodes trials
+    """
+    return _pa_edges(num_final_nodes, num_existing_nodes, False, seed)
+
+def upa_edges(num_final_nodes, num_existing_nodes, seed=None):
+    """
+    Yields the undirected edges of a UPA graph with num_final_nodes
+    nodes in which each new node is joined to num_existing_nodes trials
+    """
+    return _pa_edges(num_final_nodes, num_existing_nodes, True, seed)
+
+# Output helpers
+
+def edges_to_dict(num_nodes, edges, directed=False):
+    """
+    Collects an iterable of edges on the nodes 0..num_nodes-1
+    into a graph represented as a dictionary of sets.
+    """
+    graph = dict((node, set([])) for node in xrange(num_nodes))
+    for tail, head in edges:
+        graph[tail].add(head)
+        if not directed:
+            graph[head].add(tail)
+    return graph
+
+def write_edge_list(edges, file_name):
+    """
+    Writes an iterable of edges to file_name, one "tail head"
+    pair per line, and returns the number of edges written.
+    """
+    num_edges = 0
+    with open(file_name, 'w') as edge_file:
+        for tail, head in edges:
+            edge_file.write("%d %d\n" % (tail, head))
+            num_edges += 1
+    return num_edges
+
+##############################################################
+
+# Unit Tests
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_er_edges(self):
+        self.assertEqual(list(er_edges(10, 0)), [])
+        self.assertEqual(sorted(er_edges(4, 1)), [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)])
+        edges = list(er_edges(200, 0.1, seed=3))
+        self.assertEqual(edges, list(er_edges(200, 0.1, seed=3)))
+        self.assertEqual(len(edges), len(set(edges)))
+        self.assertTrue(all(0 <= nodei < nodej < 200 for nodei, nodej in edges))
+        # The expected number of edges is 1990; allow a wide margin
+        self.assertTrue(1600 < len(edges) < 2400)
+
+    def test_pa_trial(self):
+        trial = PATrial(3, seed=1)
+        neighbors = trial.run_trial(3)
+        self.assertTrue(0 < len(neighbors) <= 3 and neighbors <= set([0, 1, 2]))
+        self.assertEqual(len(trial._node_numbers), 9 + 1 + len(neighbors))
+        trial = PATrial(3, undirected=True, seed=1)
+        neighbors = trial.run_trial(3)
+        self.assertEqual(len(trial._node_numbers), 9 + 1 + 2 * len(neighbors))
+
+    def test_dpa_edges(self):
+        digraph = edges_to_dict(100, dpa_edges(100, 3, seed=5), directed=True)
+        self.assertEqual(digraph[0], set([1, 2]))
+        self.assertEqual(list(dpa_edges(100, 3, seed=5)), list(dpa_edges(100, 3, seed=5)))
+        for node in range(3, 100):
+            self.assertTrue(0 < len(digraph[node]) <= 3)
+            self.assertTrue(max(digraph[node]) < node)
+
+    def test_upa_edges(self):
+        ugraph = edges_to_dict(100, upa_edges(100, 3, seed=5))
+        self.assertTrue(ugraph[0] >= set([1, 2]))
+        for node in ugraph:
+            self.assertTrue(node not in ugraph[node])
+            for neighbor in ugraph[node]:
+                self.assertTrue(node in ugraph[neighbor])
+
+    def test_outputs(self):
+        edges = list(er_edges(50, 0.2, seed=7))
+        graph = edges_to_dict(50, edges)
+        self.assertEqual(CSRGraph.from_edges(50, edges).to_dict(), graph)
+        self.assertEqual(sum(len(graph[node]) for node in graph), 2 * len(edges))
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
@@ -0,0 +1,237 @@
+"""
+Streaming loader for the text representation of graphs used by
+the Module 1 and Module 2 applications.
+
+Each line of a graph file holds a node followed by its neighbors,
+separated by spaces. The file may be a URL, a local path or a
+gzip-compressed local path ending in ".gz". Lines are read and
+parsed one at a time, so the whole text is never held in memory,
+and the graph can be built either as a dictionary of sets or as a
+compact CSRGraph. In both forms a neighbor without a line of its own
+is added as a node with no neighbors, and a neighbor repeated on a
+line is kept once.
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+import urllib2
+from array import array
+import numpy
+import graph_cache
+from csr_graph import CSRGraph, OFFSET_TYPECODE
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def open_graph_file(source):
+    """
+    Open the graph file source, which may be a URL,
+    a gzip-compressed path ending in ".gz" or a plain path
+    """
+    if source.startswith("http://") or source.startswith("https://"):
+        return urllib2.urlopen(source)
+    if source.endswith(".gz"):
+        return gzip.open(source, 'rb')
+    return open(source, 'r')
+
+def source_identity(source):
+    """
+    Return a one-line string identifying the graph file source: the
+    URL itself, or the absolute path, size and modification time of a
+    local file, so that a changed file gets a new identity
+    """
+    if source.startswith("http://") or source.startswith("https://"):
+        return "url " + source
+    info = os.stat(source)
+    return "file %s %d %r" % (os.path.abspath(source), info.st_size, info.st_mtime)
+
+def default_cache_dir(source):
+    """
+    Return a cache directory for the graph file source inside the
+    temporary directory, named after the file and a hash of source
+    """
+    name = os.path.basename(source.rstrip("/")) or "graph"
+    digest = hashlib.md5(source).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), "graph_cache", name + "-" + digest)
+
+def peak_memory_mb():
+    """
+    Return the peak resident memory of this process in megabytes,
+    or None where the resource module is unavailable. ru_maxrss is
+    counted in bytes on macOS and in kilobytes elsewhere.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / float(2 ** 20)
+    return peak / 1024.0
+
+def read_graph(source, compact=False):
+    """
+    Read the graph in source line by line and return a tuple
+    (graph, stats). graph is a dictionary of sets, or a CSRGraph
+    if compact is True. stats is a dictionary holding the number of
+    nodes, edges and bytes read, the elapsed seconds, the bytes read
+    per second and the peak memory of the process in megabytes.
+    """
+    start = time.time()
+    num_bytes = 0
+    graph = {}
+    nodes = array(OFFSET_TYPECODE)
+    offsets = array(OFFSET_TYPECODE, [0])
+    heads = array(OFFSET_TYPECODE)
+
+    graph_file = open_graph_file(source)
+    try:
+        for line in graph_file:
+            num_bytes += len(line)
+            values = map(int, line.split())
+            if not values:
+                continue
+            if compact:
+                nodes.append(values[0])
+                heads.extend(set(values[1:]))
+                offsets.append(len(heads))
+            else:
+                graph[values[0]] = set(values[1:])
+    finally:
+        graph_file.close()
+
+    if compact:
+        missing = numpy.setdiff1d(graph_cache.as_numpy_array(heads, numpy.int64),
+                                  graph_cache.as_numpy_array(nodes, numpy.int64))
+        nodes.extend(missing.tolist())
+        offsets.extend(array(OFFSET_TYPECODE, [len(heads)]) * len(missing))
+        graph = CSRGraph.from_adjacency(nodes, offsets, heads)
+        num_edges = graph.num_arcs()
+    else:
+        for neighbors in graph.values():
+            for head in neighbors:
+                if head not in graph:
+                    graph[head] = set([])
+        num_edges = sum(len(neighbors) for neighbors in graph.itervalues())
+
+    elapsed = time.time() - start
+    stats = {"nodes": len(graph),
+             "edges": num_edges,
+             "bytes": num_bytes,
+             "seconds": elapsed,
+             "bytes_per_second": num_bytes / elapsed if elapsed > 0 else float("inf"),
+             "peak_memory_mb": peak_memory_mb()}
+    return graph, stats
+
+def load_graph(source, compact=False, cache_dir=None):
+    """
+    Function that loads a graph given a URL or path
+    for a text representation of the graph
+
+    Returns a dictionary that models a graph, or a CSRGraph
+    if compact is True. If cache_dir is given, the graph is reopened
+    from the binary cache in cache_dir when that cache was written
+    from the same source (see source_identity); otherwise it is
+    parsed, written to cache_dir and returned as a CSRGraph.
+    """
+    if cache_dir is not None:
+        identity = source_identity(source)
+        if graph_cache.is_cached(cache_dir, identity):
+            return graph_cache.open_graph(cache_dir)
+        compact = True
+    graph, stats = read_graph(source, compact)
+    if cache_dir is not None:
+        graph_cache.save_graph(graph, cache_dir, identity)
+    print "Loaded graph with", stats["nodes"], "nodes and", stats["edges"], "edges",
+    print "at %.1f MB/s" % (stats["bytes_per_second"] / 2 ** 20),
+    if stats["peak_memory_mb"] is not None:
+        print "(peak memory %.1f MB)" % stats["peak_memory_mb"],
+    print
+    return graph
+
+##############################################################
+
+# Unit Tests
+
+GRAPH_TEXT = "0 1 2 \n1 2 \n2 \n5 0 \n"
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".txt")
+        os.close(handle)
+        with open(self.path, 'w') as graph_file:
+            graph_file.write(GRAPH_TEXT)
+        self.gz_path = self.path + ".gz"
+        gz_file = gzip.open(self.gz_path, 'wb')
+        gz_file.write(GRAPH_TEXT)
+        gz_file.close()
+
+    def tearDown(self):
+        os.remove(self.path)
+        os.remove(self.gz_path)
+
+    def test_read_graph(self):
+        expected = {0: set([1, 2]), 1: set([2]), 2: set([]), 5: set([0])}
+        graph, stats = read_graph(self.path)
+        self.assertEqual(graph, expected)
+        self.assertEqual(stats["nodes"], 4)
+        self.assertEqual(stats["edges"], 4)
+        self.assertEqual(stats["bytes"], len(GRAPH_TEXT))
+        self.assertEqual(read_graph(self.gz_path)[0], expected)
+        compact_graph = read_graph(self.gz_path, compact=True)[0]
+        self.assertTrue(isinstance(compact_graph, CSRGraph))
+        self.assertEqual(compact_graph.to_dict(), expected)
+
+    def test_missing_lines(self):
+        # Node 9 is cited but has no line of its own
+        with open(self.path, 'w') as graph_file:
+            graph_file.write("0 1 9\n1\n")
+        expected = {0: set([1, 9]), 1: set([]), 9: set([])}
+        self.assertEqual(read_graph(self.path)[0], expected)
+        self.assertEqual(read_graph(self.path, compact=True)[0].to_dict(), expected)
+        self.assertEqual(read_graph(self.path)[1]["nodes"], 3)
+
+    def test_repeated_neighbors(self):
+        with open(self.path, 'w') as graph_file:
+            graph_file.write("0 1 1 2\n1 0\n2\n")
+        graph, stats = read_graph(self.path)
+        compact_graph, compact_stats = read_graph(self.path, compact=True)
+        self.assertEqual(compact_graph.to_dict(), graph)
+        self.assertEqual(sorted(compact_graph[0]), [1, 2])
+        self.assertEqual((compact_stats["edges"], stats["edges"]), (3, 3))
+
+    def test_load_graph_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            graph = load_graph(self.path, cache_dir=cache_dir)
+            self.assertTrue(graph_cache.is_cached(cache_dir, source_identity(self.path)))
+            self.assertEqual(load_graph(self.path, cache_dir=cache_dir).to_dict(), graph.to_dict())
+            # Another file, or the same file changed, replaces the cached graph
+            other = load_graph(self.gz_path, cache_dir=cache_dir)
+            self.assertTrue(graph_cache.is_cached(cache_dir, source_identity(self.gz_path)))
+            self.assertEqual(other.to_dict(), graph.to_dict())
+            with open(self.path, 'w') as graph_file:
+                graph_file.write("7 8\n8 7\n")
+            self.assertEqual(load_graph(self.path, cache_dir=cache_dir).to_dict(),
+                             {7: set([8]), 8: set([7])})
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_default_cache_dir(self):
+        url = "http://storage.googleapis.com/codeskulptor-alg/alg_rf7.txt"
+        self.assertTrue(os.path.basename(default_cache_dir(url)).startswith("alg_rf7.txt-"))
+        self.assertNotEqual(default_cache_dir(url), default_cache_dir(self.path))
+        self.assertEqual(source_identity(url), "url " + url)
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
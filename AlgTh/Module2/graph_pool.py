@@ -0,0 +1,124 @@
+"""
+Process pools whose workers share one read-only graph.
+
+The graph is written once to a temporary binary cache (see
+graph_cache) and every worker reads it into typed arrays when it
+starts, so tasks only carry their own small arguments. Workers copy
+the arrays rather than mapping them because tasks walk the whole
+graph, and neighbor lookups on a memory map are several times
+slower. Task functions must be defined at module level and fetch the
+graph with worker_graph().
+
+The cache only holds integer keys, so workers see the graph with
+every node renamed to its dense id. Tasks pass dense ids, and
+GraphPool.node_index translates them back to the original keys.
+"""
+
+import multiprocessing
+import shutil
+import tempfile
+import unittest
+import graph_cache
+from csr_graph import CSRGraph, DeletionOverlay, as_csr
+
+# Graph opened by each worker process
+_WORKER_GRAPH = None
+
+def _init_worker(cache_dir):
+    """
+    Read the cached graph once in a worker process
+    """
+    global _WORKER_GRAPH
+    _WORKER_GRAPH = graph_cache.open_graph(cache_dir, mmap=False)
+
+def worker_graph():
+    """
+    Return the graph shared with the current worker process
+    """
+    return _WORKER_GRAPH
+
+class GraphPool:
+    """
+    Pool of num_workers processes (all CPUs by default) sharing graph
+    """
+
+    def __init__(self, graph, num_workers=None):
+        """
+        Cache graph and start the worker processes. Only the remaining
+        nodes of a DeletionOverlay are shared, with new dense ids.
+        """
+        graph = as_csr(graph)
+        if isinstance(graph, DeletionOverlay):
+            graph = CSRGraph.from_dict(graph)
+        self._index = graph.node_index()
+        offsets, neighbors = graph.arrays()[1:]
+        self._cache_dir = tempfile.mkdtemp()
+        try:
+            graph_cache.save_graph(CSRGraph(xrange(len(graph)), offsets, neighbors),
+                                   self._cache_dir)
+            self._pool = multiprocessing.Pool(num_workers, _init_worker, (self._cache_dir,))
+        except:
+            shutil.rmtree(self._cache_dir)
+            raise
+        self._num_workers = num_workers or multiprocessing.cpu_count()
+
+    def node_index(self):
+        """
+        Return the NodeIndex mapping the dense ids used as node keys
+        in the workers to the keys of the original graph
+        """
+        return self._index
+
+    def num_workers(self):
+        """
+        Return the number of worker processes
+        """
+        return self._num_workers
+
+    def map(self, func, tasks):
+        """
+        Apply func to every task in the workers and return the results in order
+        """
+        return self._pool.map(func, tasks)
+
+    def close(self):
+        """
+        Stop the workers and remove the cached graph
+        """
+        self._pool.close()
+        self._pool.join()
+        shutil.rmtree(self._cache_dir)
+
+def _worker_degree(node):
+    """
+    Return the degree of node in the worker's graph
+    """
+    return worker_graph().degree(node)
+
+##############################################################
+
+# Unit Tests
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_graph_pool(self):
+        pool = GraphPool({0: set([1, 2]), 1: set([0]), 2: set([0])}, 2)
+        try:
+            self.assertEqual(pool.num_workers(), 2)
+            self.assertEqual(pool.map(_worker_degree, [0, 1, 2]), [2, 1, 1])
+        finally:
+            pool.close()
+
+    def test_string_keys(self):
+        pool = GraphPool({"dog": set(["cat", "ape"]), "cat": set(["dog"]), "ape": set(["dog"])}, 2)
+        try:
+            ids = pool.node_index().node_ids(["dog", "cat", "ape"])
+            self.assertEqual(pool.map(_worker_degree, ids), [2, 1, 1])
+        finally:
+            pool.close()
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
@@ -0,0 +1,222 @@
+"""
+Interning of node keys as dense ids.
+
+Array-based graph algorithms number the nodes 0..n-1, while callers
+use whatever keys their graphs have: strings such as the nodes of
+GRAPH5 in the Project, or the sparse integer keys of the loaded
+graph files. A NodeIndex maps each key to its dense id once, so that
+algorithms can work on the ids and translate their results back.
+
+Two cases avoid hashing altogether:
+
+    identity keys - when the keys are exactly 0..n-1 in order, a key
+                    is its own id and no table is built
+    integer keys  - a batch of integer keys is translated with one
+                    vectorized binary search over the sorted keys
+                    when NumPy is available
+"""
+
+import numbers
+import unittest
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Typecode of the id arrays returned by node_ids
+ID_TYPECODE = 'i'
+
+def _is_integer(node):
+    """
+    Check whether node is an integer key, including NumPy integers.
+    Booleans are not, although bool is a subclass of int.
+    """
+    return isinstance(node, numbers.Integral) and not isinstance(node, bool)
+
+def _is_identity(nodes):
+    """
+    Check whether nodes is exactly the sequence of integers 0..n-1
+    """
+    if isinstance(nodes, xrange):
+        return len(nodes) == 0 or (nodes[0] == 0 and nodes[-1] == len(nodes) - 1)
+    for idx, node in enumerate(nodes):
+        if node != idx or not _is_integer(node):
+            return False
+    return True
+
+class NodeIndex:
+    """
+    Two-way mapping between node keys and dense ids 0..n-1
+    """
+
+    def __init__(self, nodes):
+        """
+        Intern the keys in nodes, giving the ith key the id i
+        """
+        if not isinstance(nodes, xrange):
+            nodes = list(nodes)
+        self._nodes = nodes
+        self._index = None
+        if not _is_identity(nodes):
+            self._index = dict((node, idx) for idx, node in enumerate(nodes))
+            assert len(self._index) == len(nodes), "Node keys must be distinct."
+        # Sorted keys and their ids for vectorized lookups, built on demand
+        self._sorted = None
+
+    def __len__(self):
+        """
+        Number of interned keys
+        """
+        return len(self._nodes)
+
+    def __iter__(self):
+        """
+        Iterate over the keys in id order
+        """
+        return iter(self._nodes)
+
+    def __contains__(self, node):
+        """
+        Check whether node has been interned
+        """
+        if self._index is None:
+            return _is_integer(node) and 0 <= node < len(self._nodes)
+        return node in self._index
+
+    def is_identity(self):
+        """
+        Check whether every key is its own dense id
+        """
+        return self._index is None
+
+    def nodes(self):
+        """
+        Return the sequence of keys indexed by dense id
+        """
+        return self._nodes
+
+    def node(self, idx):
+        """
+        Return the key with dense id idx
+        """
+        return self._nodes[idx]
+
+    def node_id(self, node):
+        """
+        Return the dense id of node, raising KeyError if it is unknown
+        """
+        if self._index is None:
+            if node not in self:
+                raise KeyError(node)
+            return node
+        return self._index[node]
+
+    def _vector_ids(self, keys):
+        """
+        Translate a sequence of integer keys with a binary search over
+        the sorted keys, or return None if that is not possible, which
+        includes keys that are not all integers (floats would otherwise
+        be truncated to the nearest key)
+        """
+        if numpy is None or not len(keys) or not len(self._nodes):
+            return None
+        if self._sorted is None:
+            if not all(_is_integer(node) for node in self._nodes):
+                self._sorted = False
+            else:
+                keys_by_id = numpy.array(self._nodes, dtype=numpy.int64)
+                order = numpy.argsort(keys_by_id, kind='mergesort')
+                self._sorted = (keys_by_id[order], order.astype(numpy.int32))
+        if self._sorted is False:
+            return None
+        try:
+            wanted = numpy.asarray(keys)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        if wanted.dtype.kind not in 'iu' or wanted.ndim != 1:
+            return None
+        wanted = wanted.astype(numpy.int64)
+        sorted_keys, ids = self._sorted
+        positions = numpy.minimum(numpy.searchsorted(sorted_keys, wanted), len(sorted_keys) - 1)
+        missing = sorted_keys[positions] != wanted
+        if missing.any():
+            raise KeyError(int(wanted[missing.argmax()]))
+        return array(ID_TYPECODE, ids[positions].tobytes())
+
+    def node_ids(self, keys):
+        """
+        Return an array holding the dense id of every key in keys,
+        raising KeyError if one is unknown
+        """
+        if self._index is None:
+            keys = list(keys)
+            for node in keys:
+                if node not in self:
+                    raise KeyError(node)
+            return array(ID_TYPECODE, keys)
+        ids = self._vector_ids(keys)
+        if ids is None:
+            index = self._index
+            ids = array(ID_TYPECODE, [index[node] for node in keys])
+        return ids
+
+    def keys_of(self, ids):
+        """
+        Return a list of the keys with the dense ids in ids
+        """
+        nodes = self._nodes
+        return [nodes[idx] for idx in ids]
+
+    def to_dict(self, values):
+        """
+        Translate values, a sequence indexed by dense id, into a
+        dictionary mapping each key to its value
+        """
+        return dict(zip(self._nodes, values))
+
+##############################################################
+
+# Unit Tests
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_identity(self):
+        index = NodeIndex(xrange(4))
+        self.assertTrue(index.is_identity())
+        self.assertTrue(NodeIndex([0, 1, 2]).is_identity())
+        self.assertEqual(index.node_id(3), 3)
+        self.assertEqual(list(index.node_ids([2, 0])), [2, 0])
+        self.assertRaises(KeyError, index.node_id, 4)
+        self.assertRaises(KeyError, index.node_ids, [1, 4])
+        self.assertFalse("a" in index)
+        self.assertFalse(True in index)
+        self.assertRaises(KeyError, index.node_id, 1.0)
+        self.assertRaises(KeyError, index.node_ids, [2.5])
+
+    def test_sparse_integers(self):
+        index = NodeIndex([40, 7, 1000, 3])
+        self.assertFalse(index.is_identity())
+        self.assertEqual(index.node_id(1000), 2)
+        self.assertEqual(list(index.node_ids([3, 40, 40, 7])), [3, 0, 0, 1])
+        self.assertRaises(KeyError, index.node_ids, [3, 8])
+        self.assertRaises(KeyError, index.node_ids, [2000])
+        self.assertEqual(index.keys_of([2, 3]), [1000, 3])
+        self.assertEqual(list(index.node_ids([])), [])
+        self.assertRaises(KeyError, NodeIndex([10, 20, 30]).node_ids, [20.7])
+        self.assertRaises(KeyError, NodeIndex([10, 20, 30]).node_ids, [True])
+        self.assertEqual(list(NodeIndex([10, 20, 30]).node_ids(array('l', [30, 10]))), [2, 0])
+
+    def test_string_keys(self):
+        index = NodeIndex(["dog", "cat", "monkey"])
+        self.assertEqual(list(index.node_ids(["monkey", "dog"])), [2, 0])
+        self.assertEqual(index.to_dict([5, 6, 7]), {"dog": 5, "cat": 6, "monkey": 7})
+        self.assertTrue("cat" in index)
+        self.assertRaises(KeyError, index.node_id, "ape")
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
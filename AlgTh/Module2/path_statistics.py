@@ -0,0 +1,228 @@
+"""
+Sampling-based estimates of shortest-path statistics.
+
+bfs_visited only tells us which nodes are reachable. The functions
+below use the level-synchronous bfs_levels from the Project to
+estimate distances without running a breadth-first search from every
+node:
+
+    double_sweep_diameter    - lower bound on the diameter from two
+                               searches (Magnien, Latapy and Habib)
+    estimate_path_statistics - average distance from sampled sources
+                               with a confidence interval, stopping
+                               once the interval is narrow enough
+
+The average distance over connected pairs is the ratio of the summed
+distances to the number of reachable pairs. It is estimated by the
+same ratio over the sampled sources, with a delta-method interval, so
+sources in large components count for as many pairs as they reach.
+
+Sampled searches run in batches over a pool of worker processes that
+share the graph through graph_pool, as in resilience_ensemble.
+"""
+
+import math
+import random
+import unittest
+import cc_and_graph_resilience as project2
+import graph_pool
+from csr_graph import DeletionOverlay, as_csr
+
+def _worker_source_summary(idx):
+    """
+    Summarize the search from the node with dense id idx in the
+    worker's graph
+    """
+    return source_summary(graph_pool.worker_graph(), idx)
+
+def source_summary(ugraph, node):
+    """
+    Runs a breadth-first search from node and returns a tuple
+    (total, reached, eccentricity): the sum of the distances to the
+    other nodes it reaches, the number of those nodes and the greatest
+    of those distances
+    """
+    levels = project2.bfs_levels(ugraph, [node])[1]
+    total = sum(depth * len(level) for depth, level in enumerate(levels))
+    reached = sum(len(level) for level in levels) - 1
+    return total, reached, len(levels) - 1
+
+def double_sweep_diameter(ugraph, start_node=None, seed=None):
+    """
+    Takes the undirected graph ugraph and returns a tuple
+    (lower_bound, node1, node2) where lower_bound is the distance
+    between node1 and node2, found by searching from start_node (a
+    random node by default) to a farthest node1 and then from node1
+    to a farthest node2. The diameter is at least lower_bound.
+    Raises ValueError if the graph is empty or start_node is not one
+    of its remaining nodes.
+    """
+    graph = as_csr(ugraph)
+    if start_node is None:
+        if len(graph) == 0:
+            raise ValueError("Cannot bound the diameter of an empty graph.")
+        start_node = random.Random(seed).choice(list(graph))
+    elif start_node not in graph:
+        raise ValueError("Start node " + repr(start_node) + " is not in the graph.")
+    first_levels = project2.bfs_levels(graph, [start_node])[1]
+    node1 = graph.node(first_levels[-1][0])
+    second_levels = project2.bfs_levels(graph, [node1])[1]
+    node2 = graph.node(second_levels[-1][0])
+    return len(second_levels) - 1, node1, node2
+
+def z_score(confidence):
+    """
+    Return the z such that a standard normal variable lies
+    within [-z, z] with probability confidence
+    """
+    target = (1.0 + confidence) / 2.0
+    low, high = 0.0, 10.0
+    for dummy_idx in range(60):
+        mid = (low + high) / 2.0
+        if 0.5 * (1.0 + math.erf(mid / math.sqrt(2.0))) < target:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2.0
+
+def _summarize(samples, confidence):
+    """
+    Takes a list of (total, reached) pairs, one per sampled source,
+    and returns the ratio estimate sum(total) / sum(reached) of the
+    average distance together with the half-width of its confidence
+    interval from the delta method
+    """
+    num_samples = len(samples)
+    total = float(sum(sample[0] for sample in samples))
+    reached = sum(sample[1] for sample in samples)
+    if reached == 0:
+        return 0.0, float("inf")
+    mean = total / reached
+    if num_samples < 2:
+        return mean, float("inf")
+    residuals = sum((sample[0] - mean * sample[1]) ** 2 for sample in samples)
+    variance = residuals / ((num_samples - 1) * num_samples * (reached / float(num_samples)) ** 2)
+    return mean, z_score(confidence) * math.sqrt(variance)
+
+def estimate_path_statistics(ugraph, confidence=0.95, relative_error=0.05,
+                             min_samples=10, max_samples=1000, batch_size=None,
+                             num_workers=None, seed=None):
+    """
+    Takes the undirected graph ugraph and estimates its average
+    distance (over pairs of distinct nodes joined by a path) from
+    searches started at randomly sampled nodes. Samples are drawn in
+    batches of batch_size (min_samples by default), searched by
+    num_workers processes (all CPUs by default, in-process if 1),
+    until at least min_samples have been taken and the confidence
+    interval is within relative_error of the mean, or max_samples is
+    reached. The results do not depend on num_workers.
+
+    Returns a dictionary holding the estimated average distance, the
+    half-width of its confidence interval, the confidence level, the
+    number of sampled searches, and a lower bound on the diameter
+    (the larger of a double sweep and the sampled eccentricities).
+    """
+    graph = as_csr(ugraph)
+    nodes = list(graph)
+    if not nodes:
+        raise ValueError("Cannot estimate path statistics of an empty graph.")
+    rng = random.Random(seed)
+    diameter_bound = double_sweep_diameter(graph, rng.choice(nodes))[0]
+    batch_size = batch_size or min_samples
+
+    pool = None
+    if num_workers != 1:
+        pool = graph_pool.GraphPool(graph, num_workers)
+
+    samples = []
+    num_samples = 0
+    mean, half_width = 0.0, float("inf")
+    try:
+        while num_samples < max_samples:
+            sources = [rng.choice(nodes) for dummy_idx in
+                       xrange(min(batch_size, max_samples - num_samples))]
+            if pool is None:
+                summaries = [source_summary(graph, node) for node in sources]
+            else:
+                summaries = pool.map(_worker_source_summary, pool.node_index().node_ids(sources))
+            num_samples += len(sources)
+            for total, reached, source_eccentricity in summaries:
+                diameter_bound = max(diameter_bound, source_eccentricity)
+                samples.append((total, reached))
+            mean, half_width = _summarize(samples, confidence)
+            if num_samples >= min_samples and half_width <= relative_error * mean:
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+
+    return {"average_distance": mean,
+            "half_width": half_width,
+            "confidence": confidence,
+            "samples": num_samples,
+            "diameter_lower_bound": diameter_bound}
+
+##############################################################
+
+# Unit Tests
+
+# Cycle on 0..5 with a pendant node 6 attached to 0
+PATH_GRAPH0 = {0: set([1, 5, 6]), 1: set([0, 2]), 2: set([1, 3]), 3: set([2, 4]),
+               4: set([3, 5]), 5: set([4, 0]), 6: set([0])}
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_source_summary(self):
+        self.assertEqual(source_summary(PATH_GRAPH0, 6), (1 + 2 + 2 + 3 + 3 + 4, 6, 4))
+        self.assertEqual(source_summary({0: set([])}, 0), (0, 0, 0))
+
+    def test_double_sweep_diameter(self):
+        self.assertEqual(double_sweep_diameter(PATH_GRAPH0, 0)[0], 4)
+        self.assertEqual(double_sweep_diameter(PATH_GRAPH0, seed=2)[0], 4)
+        view = DeletionOverlay(PATH_GRAPH0)
+        view.delete_node(0)
+        self.assertRaises(ValueError, double_sweep_diameter, view, 0)
+        self.assertEqual(double_sweep_diameter(view, 1)[0], 4)
+        self.assertRaises(ValueError, double_sweep_diameter, PATH_GRAPH0, 99)
+        self.assertRaises(ValueError, double_sweep_diameter, {})
+
+    def test_z_score(self):
+        self.assertAlmostEqual(z_score(0.95), 1.96, places=2)
+        self.assertAlmostEqual(z_score(0.99), 2.576, places=2)
+
+    def test_estimate_path_statistics(self):
+        serial = estimate_path_statistics(PATH_GRAPH0, num_workers=1, seed=4, max_samples=50)
+        parallel = estimate_path_statistics(PATH_GRAPH0, num_workers=2, seed=4, max_samples=50)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial["diameter_lower_bound"], 4)
+        self.assertTrue(1.5 < serial["average_distance"] < 2.5)
+        self.assertTrue(10 <= serial["samples"] <= 50)
+        words = dict((str(node), set(str(neighbor) for neighbor in PATH_GRAPH0[node]))
+                     for node in PATH_GRAPH0)
+        self.assertEqual(estimate_path_statistics(words, num_workers=2, batch_size=10, seed=4,
+                                                  max_samples=50),
+                         estimate_path_statistics(words, num_workers=1, seed=4, max_samples=50))
+        # A complete graph has no variance, so sampling stops at once
+        complete = dict((node, set(range(5)) - set([node])) for node in range(5))
+        exact = estimate_path_statistics(complete, num_workers=1, seed=1)
+        self.assertEqual((exact["average_distance"], exact["samples"]), (1.0, 10))
+        self.assertRaises(ValueError, estimate_path_statistics, {}, num_workers=1)
+
+    def test_disconnected(self):
+        # Path 0 - ... - 9 and the edge 10 - 11: the pair average is
+        # dominated by the path, which a mean of per-source means is not
+        ugraph = dict((node, set([node - 1, node + 1]) & set(range(10))) for node in range(10))
+        ugraph.update({10: set([11]), 11: set([10])})
+        summaries = [source_summary(ugraph, node)[:2] for node in ugraph]
+        exact = sum(total for total, dummy in summaries) / float(sum(reached for dummy, reached
+                                                                     in summaries))
+        self.assertAlmostEqual(_summarize(summaries, 0.95)[0], exact)
+        estimate = estimate_path_statistics(ugraph, relative_error=0.02, max_samples=2000,
+                                            num_workers=1, seed=3)
+        self.assertTrue(abs(estimate["average_distance"] - exact) <= estimate["half_width"])
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
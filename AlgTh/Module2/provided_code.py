@@ -3,10 +3,10 @@ Provided code for Application portion of Module 2
 """
 
 # general imports
-import urllib2
 import random
 import time
 import math
+import graph_io
 
 # Desktop imports
 import matplotlib.pyplot as plt
@@ -68,27 +68,13 @@ NETWORK_URL = "http://storage.googleapis.com/codeskulptor-alg/alg_rf7.txt"
 
 def load_graph(graph_url):
     """
-    Function that loads a graph given the URL
-    for a text representation of the graph
+    Function that loads a graph given the URL (or a local,
+    optionally gzip-compressed, path) for a text representation
+    of the graph
     
     Returns a dictionary that models a graph
     """
-    graph_file = urllib2.urlopen(graph_url)
-    graph_text = graph_file.read()
-    graph_lines = graph_text.split('\n')
-    graph_lines = graph_lines[ : -1]
-    
-    print "Loaded graph with", len(graph_lines), "nodes"
-    
-    answer_graph = {}
-    for line in graph_lines:
-        neighbors = line.split(' ')
-        node = int(neighbors[0])
-        answer_graph[node] = set([])
-        for neighbor in neighbors[1 : -1]:
-            answer_graph[node].add(int(neighbor))
-
-    return answer_graph
+    return graph_io.load_graph(graph_url)
 
 
 ##########################################################
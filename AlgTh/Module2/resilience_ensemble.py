@@ -0,0 +1,144 @@
+"""
+Ensembles of random-attack resilience curves.
+
+A single random attack order gives a noisy resilience curve. The
+functions below run many trials, each with its own random order,
+over a pool of worker processes and aggregate the curves into a mean
+and percentile bands.
+
+The graph is written once to a binary cache and every worker reads it
+when it starts (see graph_pool), so the graph is not pickled per
+task. Workers see the nodes renamed to their dense ids, which leaves
+the curves unchanged, so graphs with any node keys can be used. Trial
+i always uses the ith seed drawn from the master seed, so the result
+is the same, curve for curve, whatever the number of workers.
+"""
+
+import random
+import unittest
+import cc_and_graph_resilience as project2
+import graph_generators
+import graph_pool
+from csr_graph import as_csr
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+def _run_trial(seed):
+    """
+    Compute the resilience of the worker's graph under
+    a random attack order drawn from seed
+    """
+    return random_attack_resilience(graph_pool.worker_graph(), seed)
+
+def random_attack_resilience(ugraph, seed):
+    """
+    Takes the undirected graph ugraph and returns its resilience
+    under an attack on all of its nodes in a random order drawn
+    from seed
+    """
+    attack_order = list(ugraph)
+    random.Random(seed).shuffle(attack_order)
+    return project2.compute_resilience(ugraph, attack_order)
+
+def trial_seeds(num_trials, seed=None):
+    """
+    Return a list of num_trials independent 64-bit seeds
+    drawn from the master seed
+    """
+    master = random.Random(seed)
+    return [master.getrandbits(64) for dummy_idx in xrange(num_trials)]
+
+def _percentile(sorted_values, percent):
+    """
+    Return the percent-th percentile of a sorted list,
+    interpolating linearly between neighboring values
+    """
+    position = (len(sorted_values) - 1) * percent / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] * (1 - fraction) + sorted_values[upper] * fraction
+
+def aggregate_curves(curves, percentiles=DEFAULT_PERCENTILES):
+    """
+    Takes a list of resilience curves of equal length and returns a
+    dictionary holding the number of trials, the mean curve and, for
+    each requested percentile, the curve of that percentile
+    """
+    num_trials = float(len(curves))
+    mean = []
+    bands = dict((percent, []) for percent in percentiles)
+    for values in zip(*curves):
+        mean.append(sum(values) / num_trials)
+        sorted_values = sorted(values)
+        for percent in percentiles:
+            bands[percent].append(_percentile(sorted_values, percent))
+    return {"trials": len(curves), "mean": mean, "percentiles": bands}
+
+def resilience_ensemble(ugraph, num_trials, seed=None, num_workers=None,
+                        percentiles=DEFAULT_PERCENTILES):
+    """
+    Takes the undirected graph ugraph and computes its resilience
+    under num_trials independent random attacks, fanned out over
+    num_workers processes (all CPUs by default, in-process if 1).
+    Returns the aggregated curves (see aggregate_curves).
+    """
+    graph = as_csr(ugraph)
+    seeds = trial_seeds(num_trials, seed)
+    if num_workers == 1:
+        curves = [random_attack_resilience(graph, trial_seed) for trial_seed in seeds]
+        return aggregate_curves(curves, percentiles)
+
+    pool = graph_pool.GraphPool(graph, num_workers)
+    try:
+        curves = pool.map(_run_trial, seeds)
+    finally:
+        pool.close()
+    return aggregate_curves(curves, percentiles)
+
+##############################################################
+
+# Unit Tests
+
+# Path 0 - 1 - 2 - 3 plus the edge 4 - 5
+ENSEMBLE_GRAPH0 = {0: set([1]), 1: set([0, 2]), 2: set([1, 3]), 3: set([2]),
+                   4: set([5]), 5: set([4])}
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_aggregate_curves(self):
+        summary = aggregate_curves([[4, 2, 0], [4, 3, 0], [4, 1, 0]], (0, 50, 100))
+        self.assertEqual(summary["trials"], 3)
+        self.assertEqual(summary["mean"], [4.0, 2.0, 0.0])
+        self.assertEqual(summary["percentiles"][0], [4, 1, 0])
+        self.assertEqual(summary["percentiles"][50], [4, 2, 0])
+        self.assertEqual(summary["percentiles"][100], [4, 3, 0])
+
+    def test_resilience_ensemble(self):
+        serial = resilience_ensemble(ENSEMBLE_GRAPH0, 20, seed=1, num_workers=1)
+        parallel = resilience_ensemble(ENSEMBLE_GRAPH0, 20, seed=1, num_workers=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial["trials"], 20)
+        self.assertEqual(len(serial["mean"]), 7)
+        self.assertEqual(serial["mean"][0], 4.0)
+        self.assertEqual(serial["mean"][-1], 0.0)
+        self.assertEqual(ENSEMBLE_GRAPH0[1], set([0, 2]))
+
+    def test_workers_match(self):
+        ugraph = graph_generators.edges_to_dict(300, graph_generators.upa_edges(300, 3, seed=4))
+        serial = resilience_ensemble(ugraph, 8, seed=3, num_workers=1)
+        self.assertEqual(resilience_ensemble(ugraph, 8, seed=3, num_workers=3), serial)
+        self.assertEqual(serial["mean"][0], 300.0)
+
+    def test_string_keys(self):
+        words = dict((str(node), set(str(neighbor) for neighbor in ENSEMBLE_GRAPH0[node]))
+                     for node in ENSEMBLE_GRAPH0)
+        serial = resilience_ensemble(words, 10, seed=2, num_workers=1)
+        self.assertEqual(resilience_ensemble(words, 10, seed=2, num_workers=2), serial)
+        self.assertEqual(serial["mean"][0], 4.0)
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
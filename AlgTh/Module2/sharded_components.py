@@ -0,0 +1,215 @@
+"""
+Connected components of graphs stored as sharded edge files.
+
+Large topology snapshots arrive as several edge files, one "tail head"
+pair per line (see graph_generators.write_edge_list). Each shard, or
+each line-aligned byte range of a shard (see degree_stats.line_ranges),
+is read by a worker process that runs its own union-find over the
+nodes it sees and returns its forest as (node, root) pairs, one for
+every node it saw other than the roots themselves. A root is only
+sent, paired with itself, when it is alone in its set, so that nodes
+whose only edge is a self-loop are kept too. The reduction step
+unions those pairs into one global union-find, whose sets are the
+connected components of the whole graph. A line that is neither
+blank nor a pair of nodes raises a ValueError.
+
+Each edge is read once, by one worker, so parsing and the shard
+union-finds spread over the processes. The reduction is not spread:
+it runs in the calling process and costs one union per pair, which
+is up to the number of nodes of every byte range summed over the
+ranges. That grows with the number of ranges, so it stays small next
+to reading the edges only while each range holds many more edges
+than nodes. The results match cc_visited and largest_cc_size on the
+same graph.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from array import array
+import degree_stats
+from union_find import UnionFind
+
+# Typecode of the node keys returned by the workers
+KEY_TYPECODE = 'l'
+
+def _intern(index, forest, node):
+    """
+    Return the union-find element of node, adding it if new
+    """
+    element = index.get(node)
+    if element is None:
+        element = forest.add_element()
+        index[node] = element
+    return element
+
+def _range_forest(task):
+    """
+    Run a union-find over the edges in the byte range (path, start,
+    stop) and return its forest as a tuple (nodes, roots) of arrays
+    pairing every node seen, other than a root with company, with
+    its root
+    """
+    path, start, stop = task
+    index = {}
+    forest = UnionFind(0)
+    with open(path, 'rb') as edge_file:
+        edge_file.seek(start)
+        while edge_file.tell() < stop:
+            line = edge_file.readline()
+            if not line:
+                break
+            values = line.split()
+            if not values:
+                continue
+            if len(values) != 2:
+                raise ValueError("Malformed edge line in " + path + ": " + repr(line))
+            forest.union(_intern(index, forest, int(values[0])),
+                         _intern(index, forest, int(values[1])))
+    keys = array(KEY_TYPECODE, [0]) * len(forest)
+    for node, element in index.iteritems():
+        keys[element] = node
+    nodes = array(KEY_TYPECODE)
+    roots = array(KEY_TYPECODE)
+    for element in xrange(len(forest)):
+        root = forest.find(element)
+        if root != element or forest.size(element) == 1:
+            nodes.append(keys[element])
+            roots.append(keys[root])
+    return nodes, roots
+
+def shard_tasks(shard_paths, num_tasks):
+    """
+    Split the shards into about num_tasks (path, start, stop) byte
+    ranges that begin at the start of a line
+    """
+    ranges_per_shard = max(1, -(-num_tasks // max(1, len(shard_paths))))
+    tasks = []
+    for path in shard_paths:
+        for start, stop in degree_stats.line_ranges(path, ranges_per_shard):
+            tasks.append((path, start, stop))
+    return tasks
+
+def sharded_components(shard_paths, nodes=(), num_workers=None):
+    """
+    Takes a list of edge files shard_paths and returns a tuple
+    (index, components) where index maps every node to an element of
+    the UnionFind components whose sets are the connected components.
+    Nodes without edges may be given in nodes. The shards are read by
+    num_workers processes (all CPUs if None, in-process if 1).
+    """
+    num_workers = num_workers or multiprocessing.cpu_count()
+    tasks = shard_tasks(shard_paths, num_workers)
+    if num_workers == 1:
+        forests = [_range_forest(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(num_workers)
+        try:
+            forests = pool.map(_range_forest, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+    # Merge the shard forests
+    index = {}
+    components = UnionFind(0)
+    for shard_nodes, shard_roots in forests:
+        for node, root in zip(shard_nodes, shard_roots):
+            components.union(_intern(index, components, node), _intern(index, components, root))
+    for node in nodes:
+        _intern(index, components, node)
+    return index, components
+
+def sharded_cc_visited(shard_paths, nodes=(), num_workers=None):
+    """
+    Takes a list of edge files shard_paths and returns a list of sets,
+    one for each connected component of the graph they hold together
+    with the isolated nodes in nodes, as cc_visited does
+    """
+    index, components = sharded_components(shard_paths, nodes, num_workers)
+    sets = {}
+    for node, element in index.iteritems():
+        sets.setdefault(components.find(element), set()).add(node)
+    return sets.values()
+
+def sharded_largest_cc_size(shard_paths, nodes=(), num_workers=None):
+    """
+    Takes a list of edge files shard_paths and returns the size of the
+    largest connected component of the graph they hold together with
+    the isolated nodes in nodes, as largest_cc_size does
+    """
+    index, components = sharded_components(shard_paths, nodes, num_workers)
+    return max([components.size(element) for element in index.itervalues()] or [0])
+
+##############################################################
+
+# Unit Tests
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def setUp(self):
+        self.shard_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.shard_dir)
+
+    def write_shards(self, shards):
+        """
+        Write each list of edges in shards to its own file
+        """
+        paths = []
+        for number, edges in enumerate(shards):
+            path = os.path.join(self.shard_dir, "shard%d.txt" % number)
+            with open(path, 'w') as edge_file:
+                edge_file.writelines("%d %d\n" % edge for edge in edges)
+            paths.append(path)
+        return paths
+
+    def test_sharded_cc_visited(self):
+        # Path 0 - 1 - 2 - 3 split over shards, the edge 10 - 11 and isolated 7
+        paths = self.write_shards([[(0, 1), (10, 11)], [(2, 3)], [(1, 2)]])
+        expected = [set([0, 1, 2, 3]), set([7]), set([10, 11])]
+        for num_workers in [1, 2, 5]:
+            components = sharded_cc_visited(paths, [7], num_workers)
+            self.assertEqual(sorted(components, key=min), expected)
+        self.assertEqual(sharded_largest_cc_size(paths, [7], 1), 4)
+        self.assertEqual(sharded_largest_cc_size([], [], 1), 0)
+
+    def test_self_loops(self):
+        import cc_and_graph_resilience as project2
+        # Node 5 only has a self-loop
+        paths = self.write_shards([[(0, 1), (5, 5)], [(1, 0)]])
+        expected = sorted(project2.cc_visited({0: set([1]), 1: set([0]), 5: set([5])}), key=min)
+        for num_workers in [1, 2]:
+            components = sharded_cc_visited(paths, (), num_workers)
+            self.assertEqual(sorted(components, key=min), expected)
+        # The root of 0 and 1 is not sent, but the lone 5 is
+        nodes, roots = _range_forest((paths[0], 0, os.path.getsize(paths[0])))
+        self.assertEqual(len(nodes), 2)
+        self.assertEqual((nodes[1], roots[1]), (5, 5))
+
+    def test_malformed_line(self):
+        path = os.path.join(self.shard_dir, "bad.txt")
+        with open(path, 'w') as edge_file:
+            edge_file.write("0 1\n\n7\n")
+        self.assertRaises(ValueError, sharded_cc_visited, [path], (), 1)
+
+    def test_matches_cc_visited(self):
+        import cc_and_graph_resilience as project2
+        import graph_generators
+        edges = list(graph_generators.er_edges(300, 0.006, seed=2))
+        ugraph = graph_generators.edges_to_dict(300, edges)
+        paths = self.write_shards([edges[part::3] for part in range(3)])
+        components = sharded_cc_visited(paths, range(300), 2)
+        self.assertEqual(sorted(map(sorted, components)),
+                         sorted(map(sorted, project2.cc_visited(ugraph))))
+        self.assertEqual(sharded_largest_cc_size(paths, range(300), 2),
+                         project2.largest_cc_size(ugraph))
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
@@ -0,0 +1,243 @@
+"""
+Triangle counts and clustering coefficients of undirected graphs.
+
+Triangles are counted with the forward algorithm of Schank and
+Wagner. Nodes are ranked by increasing degree and every edge is kept
+only at its lower-ranked end, so each node keeps at most O(sqrt(m))
+forward neighbors. Each triangle is then found exactly once, by
+merging the sorted forward lists at the two ends of its lowest edge,
+and the whole count runs in O(m^1.5) time.
+
+Work can be split by ranges of ranks over a graph_pool.GraphPool; the
+ranges are chosen so that each holds about the same number of forward
+edges. The pool shares the forward lists themselves, stored as a
+CSRGraph on the ranks, so workers neither rank the nodes again nor
+sort their neighbors, and the partial counts are summed with NumPy.
+"""
+
+import unittest
+from array import array
+import numpy
+import graph_pool
+from csr_graph import CSRGraph, DeletionOverlay, OFFSET_TYPECODE, NEIGHBOR_TYPECODE, as_csr
+from graph_cache import as_numpy_array, as_typed_array
+
+# Forward lists read from the worker's graph on the first task
+_WORKER_FORWARD = None
+
+def forward_lists(ugraph):
+    """
+    Takes the undirected graph ugraph and returns a tuple (order,
+    forward) where order lists the live dense ids by increasing
+    (degree, id) and forward[rank] is the sorted list of the ranks
+    of the neighbors of order[rank] that are ranked above it
+    """
+    graph = as_csr(ugraph)
+    removed = graph.removed_mask()
+    degrees = graph.degree_ids()
+    order = [idx for idx in xrange(graph.num_ids()) if not (removed and removed[idx])]
+    order.sort(key=lambda idx: degrees[idx])
+    rank = array('i', [-1]) * graph.num_ids()
+    for position, idx in enumerate(order):
+        rank[idx] = position
+    forward = []
+    for position, idx in enumerate(order):
+        forward.append(sorted(rank[neighbor] for neighbor in graph.neighbor_ids(idx)
+                              if rank[neighbor] > position))
+    return order, forward
+
+def _forward_graph(forward):
+    """
+    Return the forward lists as a CSRGraph whose node with key and
+    dense id rank has the forward neighbors of that rank
+    """
+    offsets = array(OFFSET_TYPECODE, [0])
+    neighbors = array(NEIGHBOR_TYPECODE)
+    for neighbor_ranks in forward:
+        neighbors.extend(neighbor_ranks)
+        offsets.append(len(neighbors))
+    return CSRGraph(xrange(len(forward)), offsets, neighbors)
+
+def _count_ranks(forward, start, stop):
+    """
+    Return an array of triangle counts indexed by rank, covering the
+    triangles whose lowest-ranked node has rank in [start, stop)
+    """
+    counts = array('l', [0]) * len(forward)
+    for low in xrange(start, stop):
+        low_list = forward[low]
+        low_len = len(low_list)
+        for middle in low_list:
+            # Every common forward neighbor of low and middle closes a triangle
+            middle_list = forward[middle]
+            middle_len = len(middle_list)
+            low_pos = middle_pos = 0
+            while low_pos < low_len and middle_pos < middle_len:
+                high = low_list[low_pos]
+                other = middle_list[middle_pos]
+                if high < other:
+                    low_pos += 1
+                elif other < high:
+                    middle_pos += 1
+                else:
+                    counts[low] += 1
+                    counts[middle] += 1
+                    counts[high] += 1
+                    low_pos += 1
+                    middle_pos += 1
+    return counts
+
+def rank_ranges(forward, num_ranges):
+    """
+    Split the ranks into at most num_ranges consecutive (start, stop)
+    ranges holding about the same number of forward edges
+    """
+    total = sum(len(neighbors) for neighbors in forward)
+    target = max(1, total // max(1, num_ranges))
+    ranges = []
+    start = 0
+    load = 0
+    for position, neighbors in enumerate(forward):
+        load += len(neighbors)
+        if load >= target and len(ranges) < num_ranges - 1:
+            ranges.append((start, position + 1))
+            start = position + 1
+            load = 0
+    if start < len(forward) or not ranges:
+        ranges.append((start, len(forward)))
+    return ranges
+
+def _worker_count(bounds):
+    """
+    Count the triangles whose lowest-ranked node has rank in the range
+    bounds, where the worker's graph holds the forward lists
+    """
+    global _WORKER_FORWARD
+    if _WORKER_FORWARD is None:
+        graph = graph_pool.worker_graph()
+        _WORKER_FORWARD = [graph.neighbor_ids(rank) for rank in xrange(graph.num_ids())]
+    return _count_ranks(_WORKER_FORWARD, bounds[0], bounds[1])
+
+def triangle_count_ids(ugraph, num_workers=1):
+    """
+    Takes the undirected graph ugraph and returns an array whose ith
+    entry is the number of triangles containing the node with dense
+    id i. With num_workers other than 1 the ranks are split into
+    ranges counted by a pool of worker processes (all CPUs if None).
+    """
+    graph = as_csr(ugraph)
+    order, forward = forward_lists(graph)
+    if num_workers == 1:
+        rank_counts = as_numpy_array(_count_ranks(forward, 0, len(forward)), numpy.int64)
+    else:
+        pool = graph_pool.GraphPool(_forward_graph(forward), num_workers)
+        try:
+            partial_counts = pool.map(_worker_count, rank_ranges(forward, 4 * pool.num_workers()))
+        finally:
+            pool.close()
+        rank_counts = numpy.zeros(len(forward), dtype=numpy.int64)
+        for counts in partial_counts:
+            rank_counts += as_numpy_array(counts, numpy.int64)
+    counts = numpy.zeros(graph.num_ids(), dtype=numpy.int64)
+    counts[numpy.array(order, dtype=numpy.int64)] = rank_counts
+    return as_typed_array(counts, 'l')
+
+def triangle_counts(ugraph, num_workers=1):
+    """
+    Takes the undirected graph ugraph and returns a dictionary
+    mapping each node to the number of triangles containing it
+    """
+    graph = as_csr(ugraph)
+    counts = triangle_count_ids(graph, num_workers)
+    return dict((node, counts[graph.node_id(node)]) for node in graph)
+
+def local_clustering(ugraph, counts=None):
+    """
+    Takes the undirected graph ugraph and returns a dictionary
+    mapping each node to its local clustering coefficient: the
+    fraction of pairs of its neighbors that are themselves adjacent
+    (0 for nodes of degree less than two). Pass the result of
+    triangle_counts as counts to avoid counting again.
+    """
+    if counts is None:
+        counts = triangle_counts(ugraph)
+    coefficients = {}
+    for node in ugraph:
+        degree = len(ugraph[node])
+        pairs = degree * (degree - 1) / 2
+        coefficients[node] = counts[node] / float(pairs) if pairs > 0 else 0.0
+    return coefficients
+
+def clustering_summary(ugraph, num_workers=1):
+    """
+    Takes the undirected graph ugraph and returns a dictionary
+    holding its number of triangles, its average local clustering
+    coefficient and its global clustering coefficient (transitivity,
+    the fraction of connected triples that close into triangles)
+    """
+    counts = triangle_counts(ugraph, num_workers)
+    coefficients = local_clustering(ugraph, counts)
+    triples = sum(len(ugraph[node]) * (len(ugraph[node]) - 1) / 2 for node in ugraph)
+    closed = sum(counts.values())
+    return {"triangles": closed / 3,
+            "average_clustering": sum(coefficients.values()) / max(1, len(coefficients)),
+            "transitivity": closed / float(triples) if triples > 0 else 0.0}
+
+##############################################################
+
+# Unit Tests
+
+# Complete graph on 0..3 with a pendant node 4 attached to 0
+TRIANGLE_GRAPH0 = {0: set([1, 2, 3, 4]),
+                   1: set([0, 2, 3]),
+                   2: set([0, 1, 3]),
+                   3: set([0, 1, 2]),
+                   4: set([0])}
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_triangle_counts(self):
+        self.assertEqual(triangle_counts(TRIANGLE_GRAPH0), {0: 3, 1: 3, 2: 3, 3: 3, 4: 0})
+        self.assertEqual(triangle_counts({0: set([1]), 1: set([0])}), {0: 0, 1: 0})
+        self.assertEqual(triangle_counts({}), {})
+
+    def test_deletion_overlay(self):
+        view = DeletionOverlay(TRIANGLE_GRAPH0)
+        view.delete_node(3)
+        self.assertEqual(triangle_counts(view), {0: 1, 1: 1, 2: 1, 4: 0})
+        self.assertEqual(triangle_counts(view, 2), {0: 1, 1: 1, 2: 1, 4: 0})
+
+    def test_process_pool(self):
+        # Wheel: hub 0 joined to the cycle 1..8, one triangle per rim edge
+        wheel = dict((node, set([0, node % 8 + 1, (node - 2) % 8 + 1])) for node in range(1, 9))
+        wheel[0] = set(range(1, 9))
+        self.assertEqual(triangle_counts(wheel, 2), triangle_counts(wheel))
+        self.assertEqual(triangle_counts(wheel)[0], 8)
+        words = {"dog": set(["cat", "ape"]), "cat": set(["dog", "ape"]),
+                 "ape": set(["dog", "cat", "eel"]), "eel": set(["ape"])}
+        self.assertEqual(triangle_counts(words, 2), {"dog": 1, "cat": 1, "ape": 1, "eel": 0})
+        view = DeletionOverlay(words)
+        view.delete_node("eel")
+        self.assertEqual(triangle_counts(view, 2), {"dog": 1, "cat": 1, "ape": 1})
+
+    def test_rank_ranges(self):
+        forward = [[1, 2], [2], [], [4], []]
+        self.assertEqual(rank_ranges(forward, 2), [(0, 1), (1, 5)])
+        self.assertEqual(rank_ranges(forward, 1), [(0, 5)])
+        self.assertEqual(rank_ranges([], 3), [(0, 0)])
+
+    def test_clustering(self):
+        coefficients = local_clustering(TRIANGLE_GRAPH0)
+        self.assertEqual(coefficients[0], 0.5)
+        self.assertEqual(coefficients[1], 1.0)
+        self.assertEqual(coefficients[4], 0.0)
+        summary = clustering_summary(TRIANGLE_GRAPH0)
+        self.assertEqual(summary["triangles"], 4)
+        self.assertAlmostEqual(summary["average_clustering"], 3.5 / 5)
+        self.assertAlmostEqual(summary["transitivity"], 12 / 15.0)
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)
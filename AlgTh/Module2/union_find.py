@@ -0,0 +1,111 @@
+"""
+Union-find (disjoint-set forest) over the dense ids 0..n-1 of a graph.
+
+Uses union by size and path halving, so a sequence of m operations
+runs in O(m * alpha(n)) time. The size of every component is tracked
+at its root, which lets the resilience functions follow the size of
+the largest connected component while nodes or edges are added.
+"""
+
+import unittest
+from array import array
+
+class UnionFind:
+    """
+    Disjoint sets of the integers 0..num_elements-1
+    """
+
+    def __init__(self, num_elements):
+        """
+        Create num_elements singleton sets
+        """
+        self._parent = array('i', xrange(num_elements))
+        self._size = array('i', [1]) * num_elements
+        self._num_sets = num_elements
+
+    def __len__(self):
+        """
+        Return the number of elements
+        """
+        return len(self._parent)
+
+    def add_element(self):
+        """
+        Add a new singleton set and return its element
+        """
+        element = len(self._parent)
+        self._parent.append(element)
+        self._size.append(1)
+        self._num_sets += 1
+        return element
+
+    def find(self, element):
+        """
+        Return the root of the set containing element
+        """
+        parent = self._parent
+        while parent[element] != element:
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, element1, element2):
+        """
+        Merge the sets containing element1 and element2 and
+        return the size of the merged set
+        """
+        root1 = self.find(element1)
+        root2 = self.find(element2)
+        size = self._size
+        if root1 == root2:
+            return size[root1]
+        if size[root1] < size[root2]:
+            root1, root2 = root2, root1
+        self._parent[root2] = root1
+        size[root1] += size[root2]
+        self._num_sets -= 1
+        return size[root1]
+
+    def size(self, element):
+        """
+        Return the size of the set containing element
+        """
+        return self._size[self.find(element)]
+
+    def num_sets(self):
+        """
+        Return the number of disjoint sets
+        """
+        return self._num_sets
+
+##############################################################
+
+# Unit Tests
+
+class TestSuite(unittest.TestCase):
+    """
+    Testcases
+    """
+
+    def test_union_find(self):
+        sets = UnionFind(5)
+        self.assertEqual(sets.num_sets(), 5)
+        self.assertEqual(sets.union(0, 1), 2)
+        self.assertEqual(sets.union(3, 4), 2)
+        self.assertEqual(sets.union(1, 0), 2)
+        self.assertEqual(sets.union(4, 0), 4)
+        self.assertEqual(sets.find(1), sets.find(3))
+        self.assertNotEqual(sets.find(2), sets.find(0))
+        self.assertEqual(sets.size(2), 1)
+        self.assertEqual(sets.size(3), 4)
+        self.assertEqual(sets.num_sets(), 2)
+
+    def test_add_element(self):
+        sets = UnionFind(0)
+        self.assertEqual(sets.add_element(), 0)
+        self.assertEqual(sets.add_element(), 1)
+        self.assertEqual(sets.union(0, 1), 2)
+        self.assertEqual((len(sets), sets.num_sets()), (2, 1))
+
+# suite = unittest.TestLoader().loadTestsFromTestCase(TestSuite)
+# unittest.TextTestRunner(verbosity=0).run(suite)